@@ -1,13 +1,16 @@
 import csv
 from datetime import datetime
-from typing import Optional
-from imgui_bundle import portable_file_dialogs as pfd #type: ignore
-from imgui_bundle import imgui, implot, ImVec2, imgui_ctx
+from enum import Enum
+from itertools import islice
+from os import path
+from typing import Callable, Optional
 import numpy as np
 from category import Category, categorise
-from imports import Import, amount
-from schedule import Timespan, Granularity
-from console import log
+from imports import Import, section_bounds
+from schedule import Timespan, Granularity, Sections, window_begins
+from table import Transactions, to_datetime, to_amount
+from worker import Job
+from profiling import timed, timer
 
 class Report:
 	def __init__(self, timespan : Timespan, movements : float, status : Optional[tuple[datetime, float]], categorised : dict):
@@ -18,12 +21,14 @@ class Report:
 
 	@staticmethod
 	def from_section(section : Import.Section, categories : list):
-		movements = [entry for entry in section.entries if entry['account'] == '']
-		status_entry = next(iter(entry for entry in section.entries if entry['account'] != ''), None)
+		is_movement = section.entries['account'].equals('')
+		movements = section.entries[is_movement]
+		status_entries = section.entries[~is_movement]
+		first = int(np.argmin(status_entries.origin)) if len(status_entries) > 0 else None #* first status of the section in load order
 		return Report(
 			timespan=section.timespan,
-			movements=sum(amount(r) for r in movements),
-			status=(datetime.strptime(status_entry['date'], "%d/%m/%Y"), amount(status_entry)) if status_entry else None,#* only sometimes present in a section
+			movements=to_amount(int(movements.amount.sum())),
+			status=(to_datetime(status_entries.date[first]), to_amount(int(status_entries.amount[first]))) if first is not None else None,#* only sometimes present in a section
 			categorised=categorise("", movements, categories),
 		)
 
@@ -34,153 +39,280 @@ class Report:
 			'status' : self.status,
 		} | self.categorised
 
-def analyse(imp: Import, categories : list[Category], granularity : Granularity, count : int = 1) -> list[Report]:
-	return [Report.from_section(s, categories) for s in imp.sectionned(granularity, count)]
+#* Analysis results as columns, one row per section & one value column per category
+class ReportMatrix:
 
-def dump_reports(reports: list[Report], filename: str) -> None:
-	log("default", "analysis", "dumping to " + filename)
+	def __init__(self, begins : np.ndarray, ends : np.ndarray, movements : np.ndarray, status_dates : np.ndarray, status_amounts : np.ndarray, names : list[str], values : np.ndarray):
+		self.begins : np.ndarray = begins #* datetime64[D]
+		self.ends : np.ndarray = ends #* datetime64[D], inclusive
+		self.movements : np.ndarray = movements
+		self.status_dates : np.ndarray = status_dates #* NaT where a section has no status
+		self.status_amounts : np.ndarray = status_amounts
+		self.names : list[str] = names
+		self.columns : dict[str, int] = { name : i for i, name in enumerate(names) }
+		self.values : np.ndarray = values #* sections x categories
+
+	def __len__(self) -> int:
+		return len(self.begins)
+
+	def column(self, name : str) -> np.ndarray:
+		return self.values[:, self.columns[name]] if name in self.columns else np.zeros(len(self))
+
+	def has_status(self) -> np.ndarray:
+		return ~np.isnat(self.status_dates)
+
+	def timespan(self, index : int) -> Timespan:
+		return Timespan(to_datetime(self.begins[index]), to_datetime(self.ends[index]))
+
+	#* middle of each section, in seconds since epoch
+	def timestamps(self) -> np.ndarray:
+		return (self.begins.astype("datetime64[s]").astype(np.float64) + self.ends.astype("datetime64[s]").astype(np.float64)) / 2.0
+
+	def report(self, index : int) -> Report:
+		return Report(
+			timespan=self.timespan(index),
+			movements=float(self.movements[index]),
+			status=(to_datetime(self.status_dates[index]), float(self.status_amounts[index])) if not np.isnat(self.status_dates[index]) else None,
+			categorised={ name : float(v) for name, v in zip(self.names, self.values[index]) },
+		)
+
+	def fieldnames(self) -> list[str]:
+		return ['timespan', 'movements', 'status'] + self.names
+
+	def rows(self):
+		for i in range(len(self)):
+			yield self.report(i).to_dict()
+
+class Mode(Enum):
+	Sections = 0 #* sum over each section
+	Rolling = 1 #* sum over a trailing window of granularity units ending with each section
+	Cumulative = 2 #* running total from the first entry up to each section end
+
+#* Keeps category masks & their daily running totals between runs, so only what changed since the last analysis is recomputed
+#* any section, window or cumulative sum is then a difference of two running totals
+class Analyser:
+
+	def __init__(self):
+		self.entries : Transactions = None
+		self.is_movement : np.ndarray = None
+		self.sections : dict[tuple[Granularity, int], tuple[Sections, np.ndarray]] = {}
+		self.masks : dict[tuple, np.ndarray] = {}
+		self.first_day : np.datetime64 = None
+		self.days : np.ndarray = None #* row index where each day of the entries starts, plus a final end index
+		self.totals : dict[tuple, np.ndarray] = {}
+		self.recomputed_masks : int = 0
+		self.recomputed_sums : int = 0
+		self.job : Job = None
+		self.progress : tuple[int, int] = (0, 1)
+
+	#* everything cached is only valid for one entries table, a reload or new source file replaces it
+	def track(self, entries : Transactions) -> None:
+		if entries is self.entries:
+			return
+		self.entries = entries
+		self.is_movement = entries['account'].equals('')
+		self.sections.clear()
+		self.masks.clear()
+		self.first_day, self.days = None, None
+		self.totals.clear()
+
+	def section_bounds(self, granularity : Granularity, count : int) -> tuple[Sections, np.ndarray]:
+		if (granularity, count) not in self.sections:
+			self.sections[(granularity, count)] = section_bounds(self.entries, granularity, count)
+		return self.sections[(granularity, count)]
+
+	#* progress over the category tree nodes, also where a superseded background run stops
+	def step(self) -> None:
+		done, total = self.progress
+		self.progress = (done + 1, total)
+		if self.job:
+			self.job.report(min(1.0, (done + 1) / total))
+
+	#* Cache key of every category mask in the tree, flattened by name
+	#* a mask only depends on the predicates on its path (and on its siblings for ".other"), not on names or active state
+	def category_keys(self, categories : list[Category], parent_key : tuple = ()) -> dict[str, tuple]:
+		keys = dict()
+		within = self.masks[parent_key] if parent_key else self.is_movement
+		has_other = parent_key != () and len(categories) > 0 #* last category is always "*.other" if has parent & not empty
+		for cat in categories[:-1] if has_other else categories:
+			key = parent_key + (cat.predicate,)
+			if key not in self.masks:
+				self.masks[key] = cat.mask(self.entries, within)
+				self.recomputed_masks += 1
+			self.step()
+			keys[cat.name] = key
+			keys |= self.category_keys(cat.sub, key)
+		if has_other:
+			key = parent_key + (tuple(cat.predicate for cat in categories[:-1]),)
+			if key not in self.masks:
+				self.masks[key] = within & ~np.logical_or.reduce([self.masks[parent_key + (cat.predicate,)] for cat in categories[:-1]] + [np.zeros(len(within), dtype=bool)])
+				self.recomputed_masks += 1
+			keys[categories[-1].name] = key
+		return keys
+
+	#* Drops the masks & totals the current tree no longer uses, every predicate typed in the editor would otherwise keep its arrays alive
+	def prune(self, used : set[tuple]) -> None:
+		for cache in (self.masks, self.totals):
+			for key in [key for key in cache if key not in used]:
+				del cache[key]
+
+	def day_bounds(self) -> np.ndarray:
+		if self.days is None:
+			self.first_day = self.entries.date[0] if len(self.entries) > 0 else np.datetime64(0, 'D')
+			days = self.first_day + np.arange((self.entries.date[-1] - self.first_day).astype(np.int64) + 2 if len(self.entries) > 0 else 1)
+			self.days = np.searchsorted(self.entries.date, days, side="left")
+		return self.days
+
+	#* Running total of the masked amounts at the start of each day of the entries, plus the final total
+	def daily_totals(self, key : tuple, mask : np.ndarray) -> np.ndarray:
+		if key not in self.totals:
+			self.totals[key] = np.append(0, np.cumsum(np.where(mask, self.entries.amount, 0)))[self.day_bounds()]
+			self.recomputed_sums += 1
+		return self.totals[key]
+
+	#* Sum over each [begins[i], ends[i]] day range, days outside of the entries count as empty
+	def range_sums(self, totals : np.ndarray, begins : np.ndarray, ends : np.ndarray) -> np.ndarray:
+		days = len(totals) - 1
+		first = np.clip((begins - self.first_day).astype(np.int64), 0, days)
+		last = np.clip((ends - self.first_day).astype(np.int64) + 1, 0, days)
+		return totals[last] - totals[first]
+
+	#* First status entry of each section in load order (files in import order, rows in file order), like the section's own entries list
+	#* rows index 0 where a section has none
+	def first_status(self, bounds : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		status_rows = np.flatnonzero(~self.is_movement)
+		starts = np.searchsorted(status_rows, bounds[:-1], side="left")
+		has_status = np.searchsorted(status_rows, bounds[1:], side="left") > starts
+		section_of = np.searchsorted(bounds, status_rows, side="right") - 1
+		by_origin = status_rows[np.lexsort((self.entries.origin[status_rows], section_of))]
+		return np.where(has_status, by_origin[np.minimum(starts, len(by_origin) - 1)] if len(by_origin) > 0 else 0, 0), has_status
+
+	def analyse(self, imp: Import, categories : list[Category], granularity : Granularity, count : int = 1, job : Job = None, mode : Mode = Mode.Sections, window : int = 1) -> ReportMatrix:
+		self.track(imp.entries)
+		self.recomputed_masks, self.recomputed_sums = 0, 0
+		self.job, self.progress = job, (0, max(1, category_count(categories)))
+		entries = self.entries
+		sections, bounds = self.section_bounds(granularity, count)
+		begins, ends = sections.begins, sections.ends
+		match mode:
+			case Mode.Rolling:
+				begins = window_begins(ends, granularity, window)
+			case Mode.Cumulative:
+				begins = np.repeat(begins[:1], len(ends))
+		movements = self.range_sums(self.daily_totals((), self.is_movement), begins, ends)
+		with timer("categorise"):
+			keys = self.category_keys(categories)
+			categorised = { name : self.range_sums(self.daily_totals(key, self.masks[key]), begins, ends) for name, key in keys.items() }
+		self.prune(set(keys.values()) | {()})
+		status_row, has_status = self.first_status(bounds)
+		names = list(categorised.keys())
+		return ReportMatrix(
+			begins=begins,
+			ends=ends,
+			movements=to_amount(movements),
+			status_dates=np.where(has_status, entries.date[status_row], np.datetime64("NaT", "D")),
+			status_amounts=np.where(has_status, to_amount(entries.amount[status_row]), np.nan),
+			names=names,
+			values=to_amount(np.column_stack([categorised[name] for name in names])) if names else np.zeros((len(sections), 0)),
+		)
+
+def category_count(categories : list[Category]) -> int:
+	return sum(1 + category_count(cat.sub) for cat in categories)
+
+def analyse(imp: Import, categories : list[Category], granularity : Granularity, count : int = 1, mode : Mode = Mode.Sections, window : int = 1) -> ReportMatrix:
+	return Analyser().analyse(imp, categories, granularity, count, mode=mode, window=window)
+
+#* CSV rows are produced & written chunk by chunk, the whole dump is never held in memory
+def dump_reports(reports: ReportMatrix, filename: str, job : Job = None, chunk_size : int = 1024) -> None:
 	with open(filename, 'w', newline='') as output:
-		writer = csv.DictWriter(output, fieldnames=reports[0].to_dict().keys(), delimiter=',')
+		writer = csv.DictWriter(output, fieldnames=reports.fieldnames(), delimiter=',')
 		writer.writeheader()
-		writer.writerows([r.to_dict() for r in reports])
-
-def plot_analysis(categories :  list[Category], analysis : list[Report], size : ImVec2 = ImVec2(0, 0)) -> None:
-	size = size if size.x > 0 or size.y > 0 else imgui.get_content_region_avail()
-	implot.begin_plot("categorical analysis", size)
-	implot.setup_axes("Time", "EUR")
-	ticks = [r.timespan.span_str("%d/%m") for r in analysis]
-	if len(ticks) > 1:
-		implot.setup_axis_ticks(implot.ImAxis_.x1, 0.0, max(1, len(ticks)-1), len(ticks), ticks, False)
-	def plot_categories(anls : list[Report], cats: list[Category], group_size: float = 1, sub_cat_size : float = 0.5) -> None:
-		value_of = lambda report, category: report.categorised[category.name] if category.name in report.categorised else 0
-		values_of = lambda category: np.array([value_of(report, category) for report in anls])
-		arr = np.ascontiguousarray([values_of(category) for category in cats if category.active])
-		implot.plot_bar_groups(
-			label_ids=[c.name for c in cats if c.active],
-			values=arr,
-			group_count=len(anls),
-			group_size=group_size,
-			flags=implot.BarGroupsFlags_.stacked,
-			shift=group_size * sub_cat_size - 0.5 # offset to make the subcategory on the side of their parent,  -0.5 to center all
+		rows = reports.rows()
+		for begin in range(0, len(reports), chunk_size):
+			writer.writerows(islice(rows, chunk_size))
+			if job:
+				job.report(min(1.0, (begin + chunk_size) / len(reports)))
+
+def dump_reports_npz(reports: ReportMatrix, filename: str, job : Job = None) -> None:
+	with open(filename, 'wb') as output: #* a file object, np.savez would append ".npz" to any other spelling of the extension
+		np.savez(output,
+			begins=reports.begins,
+			ends=reports.ends,
+			movements=reports.movements,
+			status_dates=reports.status_dates,
+			status_amounts=reports.status_amounts,
+			names=np.array(reports.names, dtype=str),
+			values=reports.values,
 		)
-		for category in cats:
-			if (category.active and category.sub):
-				plot_categories(anls, category.sub, group_size=group_size * 0.5, sub_cat_size=sub_cat_size)
-	plot_categories(analysis, categories)
-	implot.end_plot()
-
-def input_granularity(title: str, granularity : tuple[Granularity, int]) -> tuple[bool, Granularity, int]:
-	gran_type, gran_count = granularity
-	changed = False
-	with imgui_ctx.tree_node(title) as tree:
-		if (tree):
-			with imgui_ctx.begin_table("##granularity", 2, flags=imgui.TableFlags_.resizable):
-				imgui.table_next_column()
-				changed_type, gran_type_new = imgui.combo("Scale", gran_type.value, ["Day", "Month", "Year"])
-				gran_type = Granularity(gran_type_new)
-				imgui.table_next_column()
-				changed_count, gran_count = imgui.input_int("Count", gran_count)
-				changed = changed_type or changed_count
-	return changed, gran_type, max(1, gran_count)
-
-#region UI
-
-class UI:
 
-	def __init__(self):
-		self.granularity_type : Granularity = Granularity.Month
-		self.granularity_count : int = 1
-		self.dump_save_dialog : pfd.save_file = None
-		self.dump_target : list[Report] = None
+#* Arrow IPC file, readable by pyarrow/polars/pandas, needs the optional pyarrow dependency
+def dump_reports_arrow(reports: ReportMatrix, filename: str, job : Job = None) -> None:
+	try:
+		import pyarrow as pa #type: ignore
+	except ImportError:
+		raise RuntimeError("Arrow export needs pyarrow (pip install pyarrow)")
+	missing_status = ~reports.has_status() #* arrow nulls instead of the NaT/NaN placeholders
+	table = pa.table({
+		'begin' : pa.array(reports.begins),
+		'end' : pa.array(reports.ends),
+		'movements' : pa.array(reports.movements),
+		'status_date' : pa.array(reports.status_dates, mask=missing_status),
+		'status_amount' : pa.array(reports.status_amounts, mask=missing_status),
+	} | { name : pa.array(reports.column(name)) for name in reports.names })
+	with pa.OSFile(filename, 'wb') as sink:
+		with pa.ipc.new_file(sink, table.schema) as writer:
+			writer.write_table(table)
 
-	@staticmethod
-	def can_analyse(imp : Import, categories : list[Category]) -> bool:
-		return imp is not None and imp.valid() and categories is not None
-
-	def analyse(self, imp : Import, categories : list[Category]) -> list[Report]:
-		return analyse(imp, categories, self.granularity_type, self.granularity_count)
-
-	def menu(self, title : str, analysis : list[Report], can_analyse : bool) -> bool:
-		should_analyse = False
-		with imgui_ctx.begin_menu(title, True) as menu:
-			if menu:
-				if not can_analyse:
-					imgui.begin_disabled()
-				if imgui.menu_item("Run", None, None)[0]:
-					should_analyse = True
-				if not can_analyse:
-					imgui.end_disabled()
-				if imgui.menu_item("Dump", None, None)[0]:
-					self.dump(analysis)
-		return should_analyse
-
-	def draw_config(self, title : str, categories : list[Category] = []) -> bool:
-		changed_gran = False
-		with imgui_ctx.begin(title) as window:
-			if window:
-				changed_gran, self.granularity_type, self.granularity_count = input_granularity("Granularity", (self.granularity_type, self.granularity_count))
-				imgui.separator()
-				with imgui_ctx.begin_list_box("##categories"):
-					def recursive_checkbox(category : Category, parent_active : bool = True) -> None:
-						flags = (
-							(imgui.TreeNodeFlags_.selected if category.active and parent_active else 0) |
-							(imgui.TreeNodeFlags_.leaf if len(category.sub) == 0 else 0) |
-							imgui.TreeNodeFlags_.open_on_arrow |
-							imgui.TreeNodeFlags_.open_on_double_click
-						)
-						tree = imgui.tree_node_ex(category.name, flags=flags)
-						if parent_active and imgui.is_item_clicked() and not imgui.is_item_toggled_open():
-							category.active = not category.active
-						if (tree):
-							for sub in category.sub:
-								recursive_checkbox(sub, parent_active and category.active)
-							imgui.tree_pop()
-					for category in categories:
-						recursive_checkbox(category)
-		return changed_gran
-
-	def dump(self, analysis : list[Report]) -> None:
-		self.dump_save_dialog = pfd.save_file("Save to", "categorical_analysis-" + datetime.now().strftime("%d_%m_%Y") + "-" + self.granularity_type.name + "-" + str(self.granularity_count) + ".csv", filters=["*.csv"])
-		self.dump_target = analysis
-
-	def draw_categorical(self, title : str, analysis :list[Report], categories : list[Category]) -> None:
-		if self.dump_save_dialog and self.dump_save_dialog.ready():
-			filepath = self.dump_save_dialog.result()
-			if (filepath):
-				dump_reports(analysis, filepath)
-			self.dump_save_dialog = None
-			self.dump_target = None
-		with imgui_ctx.begin(title) as window:
-			if window and analysis and len(analysis) > 0:
-				if imgui.button("Dump"):
-					self.dump(analysis)
-				plot_analysis(
-					categories=categories,
-					analysis=analysis,
-					size=imgui.get_content_region_avail()
-				)
-
-	def draw_status(self, title : str, analysis : list[Report]) -> None:
-		with imgui_ctx.begin(title) as window:
-			if window and analysis and len(analysis) > 0:
-				if imgui.button("Dump"):
-					self.dump(analysis)
-				implot.begin_plot("Status tracking", imgui.get_content_region_avail())
-				implot.setup_axes("Time", "EUR")
-				implot.setup_axis_scale(implot.ImAxis_.x1, implot.Scale_.time)
-
-				implot.plot_line(
-					label_id="Amount",
-					xs=np.ascontiguousarray([report.status[0].timestamp() for report in analysis if report.status is not None]),
-					ys=np.ascontiguousarray([report.status[1] for report in analysis if report.status is not None])
-				)
-
-				implot.plot_line(
-					label_id="Income",
-					xs=np.ascontiguousarray([report.timespan.timestamp() for report in analysis]),
-					ys=np.ascontiguousarray([report.movements for report in analysis])
-				)
-
-				implot.end_plot()
-
-#endregion UI
+dump_formats : dict[str, Callable[[ReportMatrix, str, Job], None]] = {
+	".csv" : dump_reports,
+	".npz" : dump_reports_npz,
+	".arrow" : dump_reports_arrow,
+}
+
+#* Dump in the format matching the file extension, csv by default
+def export_reports(reports: ReportMatrix, filename: str, job : Job = None) -> None:
+	dump_formats.get(path.splitext(filename)[1].lower(), dump_reports)(reports, filename, job)
+
+#* Identity & active state of every category in the tree, plot buffers are valid as long as it does not change
+def category_state(categories : list[Category]) -> tuple:
+	return tuple((id(cat), cat.active, category_state(cat.sub)) for cat in categories)
+
+#* Contiguous plot buffers of an analysis, built once per reports & category state and reused every frame
+class PlotData:
+
+	class BarGroups:
+		def __init__(self, labels : list[str], values : np.ndarray, group_size : float, shift : float):
+			self.labels : list[str] = labels
+			self.values : np.ndarray = values
+			self.group_size : float = group_size
+			self.shift : float = shift
+
+	@timed("plot data")
+	def __init__(self, analysis : ReportMatrix, categories : list[Category], sub_cat_size : float = 0.5):
+		self.analysis : ReportMatrix = analysis
+		self.state : tuple = category_state(categories)
+		self.ticks : list[str] = [analysis.timespan(i).span_str("%d/%m") for i in range(len(analysis))]
+		self.bar_groups : list[PlotData.BarGroups] = []
+		self.add_bar_groups(categories, 1, sub_cat_size)
+		has_status = analysis.has_status()
+		self.status_xs : np.ndarray = np.ascontiguousarray(analysis.status_dates[has_status].astype("datetime64[s]").astype(np.float64))
+		self.status_ys : np.ndarray = np.ascontiguousarray(analysis.status_amounts[has_status])
+		self.income_xs : np.ndarray = np.ascontiguousarray(analysis.timestamps())
+		self.income_ys : np.ndarray = np.ascontiguousarray(analysis.movements, dtype=np.float64)
+
+	#* one stacked bar group per category tree level, subcategories are drawn narrower on the side of their parent
+	def add_bar_groups(self, categories : list[Category], group_size : float, sub_cat_size : float) -> None:
+		active = [c for c in categories if c.active]
+		if active:
+			self.bar_groups.append(PlotData.BarGroups(
+				labels=[c.name for c in active],
+				values=np.ascontiguousarray(np.stack([self.analysis.column(c.name) for c in active])),
+				group_size=group_size,
+				shift=group_size * sub_cat_size - 0.5 # offset to make the subcategory on the side of their parent,  -0.5 to center all
+			))
+		for category in active:
+			if category.sub:
+				self.add_bar_groups(category.sub, group_size * 0.5, sub_cat_size)
+
+	def valid_for(self, analysis : ReportMatrix, categories : list[Category]) -> bool:
+		return self.analysis is analysis and self.state == category_state(categories)
@@ -0,0 +1,208 @@
+from datetime import datetime
+from imgui_bundle import portable_file_dialogs as pfd #type: ignore
+from imgui_bundle import imgui, implot, ImVec2, imgui_ctx
+from category import Category
+from imports import Import
+from schedule import Granularity
+from console import log, LogEntry as Log
+from analysis import Analyser, Mode, ReportMatrix, PlotData, export_reports
+from worker import Job, Worker
+from profiling import timed
+
+@timed("plot_analysis")
+def plot_analysis(plot : PlotData, size : ImVec2 = ImVec2(0, 0)) -> None:
+	size = size if size.x > 0 or size.y > 0 else imgui.get_content_region_avail()
+	implot.begin_plot("categorical analysis", size)
+	implot.setup_axes("Time", "EUR")
+	if len(plot.ticks) > 1:
+		implot.setup_axis_ticks(implot.ImAxis_.x1, 0.0, max(1, len(plot.ticks)-1), len(plot.ticks), plot.ticks, False)
+	for group in plot.bar_groups:
+		implot.plot_bar_groups(
+			label_ids=group.labels,
+			values=group.values,
+			group_count=len(plot.analysis),
+			group_size=group.group_size,
+			flags=implot.BarGroupsFlags_.stacked,
+			shift=group.shift
+		)
+	implot.end_plot()
+
+def input_granularity(title: str, granularity : tuple[Granularity, int]) -> tuple[bool, Granularity, int]:
+	gran_type, gran_count = granularity
+	changed = False
+	with imgui_ctx.tree_node(title) as tree:
+		if (tree):
+			with imgui_ctx.begin_table("##granularity", 2, flags=imgui.TableFlags_.resizable):
+				imgui.table_next_column()
+				changed_type, gran_type_new = imgui.combo("Scale", gran_type.value, ["Day", "Month", "Year"])
+				gran_type = Granularity(gran_type_new)
+				imgui.table_next_column()
+				changed_count, gran_count = imgui.input_int("Count", gran_count)
+				changed = changed_type or changed_count
+	return changed, gran_type, max(1, gran_count)
+
+def input_mode(title : str, mode : tuple[Mode, int]) -> tuple[bool, Mode, int]:
+	mode_type, window = mode
+	changed = False
+	with imgui_ctx.tree_node(title) as tree:
+		if (tree):
+			with imgui_ctx.begin_table("##mode", 2, flags=imgui.TableFlags_.resizable):
+				imgui.table_next_column()
+				changed_type, mode_type_new = imgui.combo("Mode", mode_type.value, [m.name for m in Mode])
+				mode_type = Mode(mode_type_new)
+				imgui.table_next_column()
+				changed_window = False
+				if mode_type == Mode.Rolling:
+					changed_window, window = imgui.input_int("Window", window)
+				changed = changed_type or changed_window
+	return changed, mode_type, max(1, window)
+
+class UI:
+
+	def __init__(self):
+		self.granularity_type : Granularity = Granularity.Month
+		self.granularity_count : int = 1
+		self.mode : Mode = Mode.Sections
+		self.window : int = 3 #* in granularity units, for rolling sums
+		self.dump_save_dialog : pfd.save_file = None
+		self.dump_target : ReportMatrix = None
+		self.analyser : Analyser = Analyser()
+		self.worker : Worker = Worker("analysis")
+		self.plot : PlotData = None
+		self.exporter : Worker = Worker("export", supersede=False)
+		self.exports : list[Job] = [] #* every export not reported yet, the worker only keeps the latest one
+
+	@staticmethod
+	def can_analyse(imp : Import, categories : list[Category]) -> bool:
+		return imp is not None and imp.valid() and categories is not None
+
+	#* Starts an analysis in the background, superseding the one in flight if any
+	def analyse(self, imp : Import, categories : list[Category]) -> Job:
+		return self.worker.submit("analysis", lambda job, *args, **kwargs: self.analyser.analyse(*args, job=job, **kwargs), imp, list(categories), self.granularity_type, self.granularity_count, mode=self.mode, window=self.window)
+
+	#* Reports of the latest analysis once it is finished, None while running or if it failed
+	def poll(self) -> ReportMatrix | None:
+		job = self.worker.poll()
+		if job is None or job.cancelled.is_set():
+			return None
+		if job.future.exception() is not None:
+			log("default", "analysis", f"analysis failed : {job.future.exception()}", Log.Level.ERR)
+			return None
+		log("default", "analysis", f"recomputed {self.analyser.recomputed_masks} category masks, {self.analyser.recomputed_sums} daily totals", Log.Level.DEBUG)
+		return job.result()
+
+	def plot_data(self, analysis : ReportMatrix, categories : list[Category]) -> PlotData:
+		if self.plot is None or not self.plot.valid_for(analysis, categories):
+			self.plot = PlotData(analysis, categories)
+		return self.plot
+
+	def draw_progress(self) -> None:
+		if self.worker.busy():
+			imgui.progress_bar(self.worker.job.progress, ImVec2(-1, 0), "Analysing...")
+		if self.exporter.busy():
+			imgui.progress_bar(self.exporter.job.progress, ImVec2(-1, 0), "Dumping...")
+
+	def menu(self, title : str, analysis : ReportMatrix, can_analyse : bool) -> bool:
+		should_analyse = False
+		with imgui_ctx.begin_menu(title, True) as menu:
+			if menu:
+				if not can_analyse:
+					imgui.begin_disabled()
+				if imgui.menu_item("Run", None, None)[0]:
+					should_analyse = True
+				if not can_analyse:
+					imgui.end_disabled()
+				if imgui.menu_item("Dump", None, None)[0]:
+					self.dump(analysis)
+		return should_analyse
+
+	def draw_config(self, title : str, categories : list[Category] = []) -> bool:
+		changed_gran = False
+		with imgui_ctx.begin(title) as window:
+			if window:
+				changed_gran, self.granularity_type, self.granularity_count = input_granularity("Granularity", (self.granularity_type, self.granularity_count))
+				changed_mode, self.mode, self.window = input_mode("Mode", (self.mode, self.window))
+				changed_gran = changed_gran or changed_mode
+				imgui.separator()
+				with imgui_ctx.begin_list_box("##categories"):
+					def recursive_checkbox(category : Category, parent_active : bool = True) -> None:
+						flags = (
+							(imgui.TreeNodeFlags_.selected if category.active and parent_active else 0) |
+							(imgui.TreeNodeFlags_.leaf if len(category.sub) == 0 else 0) |
+							imgui.TreeNodeFlags_.open_on_arrow |
+							imgui.TreeNodeFlags_.open_on_double_click
+						)
+						tree = imgui.tree_node_ex(category.name, flags=flags)
+						if parent_active and imgui.is_item_clicked() and not imgui.is_item_toggled_open():
+							category.active = not category.active
+						if (tree):
+							for sub in category.sub:
+								recursive_checkbox(sub, parent_active and category.active)
+							imgui.tree_pop()
+					for category in categories:
+						recursive_checkbox(category)
+		return changed_gran
+
+	def dump(self, analysis : ReportMatrix) -> None:
+		self.dump_save_dialog = pfd.save_file("Save to", "categorical_analysis-" + datetime.now().strftime("%d_%m_%Y") + "-" + self.granularity_type.name + "-" + str(self.granularity_count) + ("" if self.mode == Mode.Sections else "-" + self.mode.name + (str(self.window) if self.mode == Mode.Rolling else "")) + ".csv", filters=["CSV", "*.csv", "NumPy", "*.npz", "Arrow IPC", "*.arrow"])
+		self.dump_target = analysis
+
+	#* Writes the dump on the export worker, the reports are never modified after analysis so they can be shared
+	def export(self, analysis : ReportMatrix, filepath : str) -> None:
+		log("default", "analysis", "dumping to " + filepath)
+		self.exports.append(self.exporter.submit("export " + filepath, lambda job, *args: export_reports(*args, job=job), analysis, filepath))
+
+	#* Starts the export picked in the save dialog & reports finished exports, called every frame whichever windows are open
+	def poll_export(self) -> None:
+		if self.dump_save_dialog and self.dump_save_dialog.ready():
+			filepath = self.dump_save_dialog.result()
+			if filepath and self.dump_target:
+				self.export(self.dump_target, filepath)
+			self.dump_save_dialog = None
+			self.dump_target = None
+		for job in [job for job in self.exports if job.done()]:
+			self.exports.remove(job)
+			if job.cancelled.is_set():
+				continue
+			if job.future.exception() is not None:
+				log("default", "analysis", f"{job.name} failed : {job.future.exception()}", Log.Level.ERR)
+			else:
+				log("default", "analysis", f"{job.name} done")
+
+	def draw_categorical(self, title : str, analysis :ReportMatrix, categories : list[Category]) -> None:
+		with imgui_ctx.begin(title) as window:
+			if window:
+				self.draw_progress()
+			if window and analysis and len(analysis) > 0:
+				if imgui.button("Dump"):
+					self.dump(analysis)
+				plot_analysis(
+					plot=self.plot_data(analysis, categories),
+					size=imgui.get_content_region_avail()
+				)
+
+	def draw_status(self, title : str, analysis : ReportMatrix, categories : list[Category] = []) -> None:
+		with imgui_ctx.begin(title) as window:
+			if window:
+				self.draw_progress()
+			if window and analysis and len(analysis) > 0:
+				if imgui.button("Dump"):
+					self.dump(analysis)
+				implot.begin_plot("Status tracking", imgui.get_content_region_avail())
+				implot.setup_axes("Time", "EUR")
+				implot.setup_axis_scale(implot.ImAxis_.x1, implot.Scale_.time)
+
+				plot = self.plot_data(analysis, categories)
+				implot.plot_line(
+					label_id="Amount",
+					xs=plot.status_xs,
+					ys=plot.status_ys
+				)
+
+				implot.plot_line(
+					label_id="Income",
+					xs=plot.income_xs,
+					ys=plot.income_ys
+				)
+
+				implot.end_plot()
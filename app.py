@@ -1,3 +1,5 @@
+import sys
+import time
 from imgui_bundle import imgui
 from imgui_bundle.python_backends.glfw_backend import GlfwRenderer
 import glfw
@@ -6,6 +8,7 @@ from vjf import  FileSlot
 from os import path
 import console
 from console import LogEntry as Log
+from profiling import record, timer
 
 class App:
 	def __init__(self, name : str = "window", dimensions : tuple[int, int] = (800, 600)):
@@ -26,6 +29,7 @@ class App:
 			raise RuntimeError("Could not initialize Window")
 		self.renderer = GlfwRenderer(self.window)
 		self.pending_file_drops = []
+		self.frame_begin : float = None
 		glfw.set_drop_callback(self.window, lambda _, paths: self.pending_file_drops.append(self.sort_pending_file_drops(paths)))
 		# Note:
 		# The way font are loaded in this example is a bit tricky.
@@ -50,18 +54,24 @@ class App:
 	def run_frame(self) -> bool:
 		if (glfw.window_should_close(self.window)):
 			return False
+		#* whole frame time, from one frame start to the next
+		now = time.perf_counter()
+		if self.frame_begin is not None:
+			record("frame", now - self.frame_begin)
+		self.frame_begin = now
 		glfw.poll_events()
 		self.renderer.process_inputs()
 		imgui.new_frame()
 		return True
 
 	def render(self, clear_color : tuple[float, float, float, float] = (0.0, 0.0, 0.0, 1.0), clear_mask : int = gl.GL_COLOR_BUFFER_BIT):
-		imgui.end_frame()
-		imgui.render()
-		gl.glClearColor(clear_color[0], clear_color[1], clear_color[2], clear_color[3])
-		gl.glClear(clear_mask)
-		self.renderer.render(imgui.get_draw_data())
-		glfw.swap_buffers(self.window)
+		with timer("render"):
+			imgui.end_frame()
+			imgui.render()
+			gl.glClearColor(clear_color[0], clear_color[1], clear_color[2], clear_color[3])
+			gl.glClear(clear_mask)
+			self.renderer.render(imgui.get_draw_data())
+			glfw.swap_buffers(self.window)
 
 	def close_next_update(self):
 		glfw.set_window_should_close(self.window, True)
@@ -73,7 +83,10 @@ class App:
 		for file in drops:
 			match path.splitext(file)[1]:
 				case ".json":
-					slot = FileSlot.from_file(file)
+					#* only the header is read here, the content is parsed when the slot is first used
+					slot = FileSlot.from_file(file, lazy=True)
+					if slot is None:
+						continue
 					if slot.format_id == "bankviz-category":
 						pending_category.append(slot)
 					elif slot.format_id == "bankviz-import":
@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from imports import bank_statement_fields
+from category import CategoryBlueprint
+
+#* Deterministic synthetic inputs for the benchmarks, the same arguments always produce the same files & trees
+
+movement_types = ["CARTE", "VIR", "PRLV", "RETRAIT", "CHQ"]
+
+def label_vocabulary(count : int) -> list[str]:
+	return [f"SHOP {i:05}" for i in range(count)]
+
+#* one statement file in the bank export format (';' separated, no header, french amounts, newest entries first)
+#* `status_rows` closing balance rows are spread evenly over the file, like the bank's periodic "SOLDE" lines
+def write_statement(filename : str, begin : date, days : int, rows : int, rng : random.Random, labels : list[str], status_rows : int = 1) -> None:
+	status_at = { (k + 1) * rows // (status_rows + 1) for k in range(status_rows) } if status_rows > 0 else set()
+	balance = rng.randint(0, 1_000_000)
+	with open(filename, "w", encoding="utf-8-sig") as out:
+		for i in range(rows):
+			day = begin + timedelta(days=(rows - i - 1) * days // rows)
+			if i in status_at:
+				entry = [day.strftime("%d/%m/%Y"), format_amount(balance), "SOLDE", "123456", "", "", "", ""]
+			else:
+				#* skewed label distribution, a few labels are most of the entries like real spending
+				label = labels[min(len(labels) - 1, int(rng.paretovariate(1.2)) - 1)] if rng.random() < 0.8 else rng.choice(labels)
+				cents = rng.randint(1, 50000) if rng.random() < 0.15 else -rng.randint(1, 20000)
+				balance += cents
+				incoming = cents > 0
+				entry = [day.strftime("%d/%m/%Y"), format_amount(cents), rng.choice(movement_types), "", "" if incoming else label, label if incoming else "", "", ""]
+			assert len(entry) == len(bank_statement_fields)
+			out.write(";".join(entry) + "\n")
+
+def format_amount(cents : int) -> str:
+	return f"{'-' if cents < 0 else ''}{abs(cents) // 100},{abs(cents) % 100:02}"
+
+#* `rows` entries over `years` years, split in one statement file per month
+def statements(directory : str, rows : int, years : int = 1, labels : int = 1000, status_rows : int = 1, seed : int = 0) -> list[str]:
+	rng = random.Random(seed)
+	vocabulary = label_vocabulary(labels)
+	months = 12 * years
+	files = []
+	for m in range(months):
+		files.append(os.path.join(directory, f"statement-{m:04}.csv"))
+		month = date(2000 + m // 12, m % 12 + 1, 1)
+		days = ((month.replace(day=28) + timedelta(days=4)).replace(day=1) - month).days
+		write_statement(files[-1], month, days, (m + 1) * rows // months - m * rows // months, rng, vocabulary, status_rows)
+	return files
+
+#* `breadth` categories per level over `depth` levels, mixing every vectorised filter kind
+def category_blueprints(depth : int = 2, breadth : int = 4, labels : int = 1000, seed : int = 0) -> list[CategoryBlueprint]:
+	rng = random.Random(seed)
+	def level(prefix : str, remaining : int) -> list[CategoryBlueprint]:
+		blueprints = []
+		for i in range(breadth):
+			name = f"{prefix}{i}"
+			match rng.randrange(3):
+				case 0:
+					filter_, config = CategoryBlueprint.Filter.Regex, (f"SHOP 0*{rng.randrange(min(labels, 50))}$|SHOP 0*{rng.randrange(labels)}$", rng.choice(["label_out", "label_in"]))
+				case 1:
+					filter_, config = CategoryBlueprint.Filter.Comparison, (rng.choice(["<", ">", "<=", ">="]), float(rng.randint(-200, 200)))
+				case _:
+					filter_, config = CategoryBlueprint.Filter.MovementTarget, f"SHOP {rng.randrange(min(labels, 20)):05}"
+			blueprints.append(CategoryBlueprint(name, filter_, config, level(name + ".", remaining - 1) if remaining > 1 else []))
+		return blueprints
+	return level("cat", depth)
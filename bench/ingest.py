@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import imports
+from imports import load_entries
+from generate import statements
+from pipeline import timed
+
+#* Times sequential vs process pool ingestion of monthly statement files, and loads from the parsed statement cache
+#* usage: python bench/ingest.py [rows per file]
+
+if __name__ == "__main__":
+	rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+	with tempfile.TemporaryDirectory() as directory:
+		files = statements(directory, 36 * rows, years=3)
+		imports.statement_cache_dir = None
+		imports.parallel_min_bytes = 0 #* always go through the pool, to measure where it starts paying off
+		load_entries(files[:2]) #* warm up the process pool
+		print("files\trows\tsequential\tparallel\tspeedup\tcached")
+		for count in [1, 2, 4, 8, 16, 32]:
+			imports.statement_cache_dir = None
+			sequential = timed(lambda: load_entries(files[:count], parallel=False))
+			parallel = timed(lambda: load_entries(files[:count]))
+			imports.statement_cache_dir = os.path.join(directory, "cache")
+			load_entries(files[:count], parallel=False)
+			cached = timed(lambda: load_entries(files[:count]))
+			print(f"{count}\t{count * rows}\t{sequential:.3f}s\t{parallel:.3f}s\t{sequential / parallel:.2f}x\t{cached:.3f}s")
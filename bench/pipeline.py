@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+import imports
+from imports import Import, load_entries, section_bounds
+from category import build_category_tree
+from analysis import Analyser, Mode, PlotData
+from schedule import Granularity
+from generate import statements, category_blueprints
+
+#* Times every stage of the analysis pipeline on synthetic statements at several scales
+#* usage: python bench/pipeline.py [--rows 10000 100000] [--output results.json]
+#* results of two commits compare with: python bench/pipeline.py --compare before.json after.json
+
+def timed(func, repeats : int = 1) -> float:
+	best = float("inf")
+	for _ in range(repeats):
+		begin = time.perf_counter()
+		func()
+		best = min(best, time.perf_counter() - begin)
+	return best
+
+def commit() -> str | None:
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True).stdout.strip()
+	except Exception:
+		return None
+
+def run_scale(directory : str, rows : int, args : argparse.Namespace) -> dict[str, float]:
+	files = statements(directory, rows, years=args.years, labels=args.labels, status_rows=args.status_rows, seed=args.seed)
+	categories = [build_category_tree(b) for b in category_blueprints(args.depth, args.breadth, args.labels, args.seed)]
+	results = {}
+
+	imports.statement_cache_dir = None
+	results["ingest.parse"] = timed(lambda: load_entries(files, parallel=False), args.repeats)
+	imports.statement_cache_dir = os.path.join(directory, "cache")
+	load_entries(files, parallel=False)
+	results["ingest.cached"] = timed(lambda: load_entries(files), args.repeats)
+	imp = Import(files=files, entries=load_entries(files))
+
+	results["section.bounds.day"] = timed(lambda: section_bounds(imp.entries, Granularity.Day), args.repeats)
+	results["section.sectionned.month"] = timed(lambda: imp.sectionned(Granularity.Month), args.repeats)
+
+	results["categorise.cold"] = timed(lambda: Analyser().analyse(imp, categories, Granularity.Month), args.repeats)
+	analyser = Analyser()
+	analyser.analyse(imp, categories, Granularity.Month)
+	results["categorise.regranulate"] = timed(lambda: analyser.analyse(imp, categories, Granularity.Day), args.repeats)
+	results["categorise.rolling.30d"] = timed(lambda: analyser.analyse(imp, categories, Granularity.Day, mode=Mode.Rolling, window=30), args.repeats)
+	results["categorise.cumulative.month"] = timed(lambda: analyser.analyse(imp, categories, Granularity.Month, mode=Mode.Cumulative), args.repeats)
+
+	reports = Analyser().analyse(imp, categories, Granularity.Day)
+	results["plot.prepare.day"] = timed(lambda: PlotData(reports, categories), args.repeats)
+	return results
+
+def compare(before : dict, after : dict) -> None:
+	print(f"stage\trows\t{before['commit']}\t{after['commit']}\tratio")
+	old = { (r["stage"], r["rows"]) : r["seconds"] for r in before["results"] }
+	for r in after["results"]:
+		if (r["stage"], r["rows"]) in old:
+			b = old[(r["stage"], r["rows"])]
+			print(f"{r['stage']}\t{r['rows']}\t{b * 1000:.2f}ms\t{r['seconds'] * 1000:.2f}ms\t{r['seconds'] / b if b > 0 else float('nan'):.2f}x")
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="bankviz pipeline benchmark")
+	parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+	parser.add_argument("--years", type=int, default=2)
+	parser.add_argument("--labels", type=int, default=1000, help="size of the label vocabulary")
+	parser.add_argument("--status-rows", type=int, default=1, help="balance rows per monthly statement")
+	parser.add_argument("--depth", type=int, default=2, help="category tree depth")
+	parser.add_argument("--breadth", type=int, default=4, help="categories per tree level")
+	parser.add_argument("--repeats", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--output", help="write the results as json")
+	parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two json results instead of running")
+	args = parser.parse_args()
+
+	if args.compare:
+		with open(args.compare[0]) as before, open(args.compare[1]) as after:
+			compare(json.load(before), json.load(after))
+		sys.exit(0)
+
+	output = {
+		"commit" : commit(),
+		"date" : datetime.now().isoformat(timespec="seconds"),
+		"python" : platform.python_version(),
+		"numpy" : np.__version__,
+		"machine" : platform.machine(),
+		"cpus" : os.cpu_count(),
+		"parameters" : { k : v for k, v in vars(args).items() if k not in ("output", "compare") },
+		"results" : [],
+	}
+	print("stage\trows\ttime")
+	for rows in args.rows:
+		with tempfile.TemporaryDirectory() as directory:
+			for stage, seconds in run_scale(directory, rows, args).items():
+				output["results"].append({ "stage" : stage, "rows" : rows, "seconds" : seconds })
+				print(f"{stage}\t{rows}\t{seconds * 1000:.2f}ms")
+	if args.output:
+		with open(args.output, "w") as out:
+			json.dump(output, out, indent="\t")
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+#* Import time of the engine modules, measured with -X importtime in fresh interpreters
+#* also checks the engine only pulls in the stdlib & numpy (exit status 1 otherwise)
+#* usage: python bench/startup.py [repeats] [--json]
+
+root = os.path.join(os.path.dirname(__file__), "..")
+core = ["table", "schedule", "console", "vjf", "worker", "profiling", "imports", "category", "analysis", "cli"]
+ui = ["console_ui", "profiling_ui", "imports_ui", "category_ui", "analysis_ui"]
+repo = set(core + ui + ["app", "run"])
+allowed = set(sys.stdlib_module_names) | repo | {"numpy", "org"} #* org.python.core is the jython probe of the stdlib copy module
+
+#* { module : (self us, cumulative us) } of every module imported by `import <module>`
+def import_times(module : str | None) -> dict[str, tuple[int, int]]:
+	result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"], cwd=root, capture_output=True, text=True, check=True)
+	times = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+		self_us, cumulative_us, name = line[len("import time:"):].split("|")
+		times[name.strip()] = (int(self_us), int(cumulative_us))
+	return times
+
+#* modules the interpreter imports on its own (site, .pth hooks), not counted against the engine
+interpreter = set(import_times(None))
+
+def measure(module : str, repeats : int) -> dict:
+	runs = [import_times(module) for _ in range(repeats)]
+	best = min(runs, key=lambda t: t[module][1])
+	best = { n : t for n, t in best.items() if n not in interpreter }
+	packages = sorted({ name.split(".")[0] for name in best })
+	heavy = sorted(((c, n) for n, (_, c) in best.items() if "." not in n and n != module), reverse=True)[:3]
+	return {
+		"module" : module,
+		"total_ms" : best[module][1] / 1000,
+		"numpy_ms" : best["numpy"][1] / 1000 if "numpy" in best else 0.0,
+		"modules" : len(best),
+		"heaviest" : [(n, c / 1000) for c, n in heavy],
+		"foreign" : [p for p in packages if p not in allowed],
+	}
+
+if __name__ == "__main__":
+	args = [a for a in sys.argv[1:] if not a.startswith("--")]
+	repeats = int(args[0]) if args else 5
+	results = [measure(m, repeats) for m in core] + [measure(m, 1) for m in ui]
+	if "--json" in sys.argv:
+		print(json.dumps(results, indent="\t"))
+	else:
+		print("module\ttotal\tnumpy\tmodules\theaviest dependencies")
+		for r in results:
+			heaviest = ", ".join(f"{n} {ms:.1f}ms" for n, ms in r["heaviest"])
+			print(f"{r['module']}\t{r['total_ms']:.1f}ms\t{r['numpy_ms']:.1f}ms\t{r['modules']}\t{heaviest}")
+	violations = [r for r in results if r["module"] in core and r["foreign"]]
+	for r in violations:
+		print(f"{r['module']} imports {', '.join(r['foreign'])}", file=sys.stderr)
+	sys.exit(1 if violations else 0)
@@ -1,32 +1,107 @@
+from collections import OrderedDict
 from copy import copy
 from enum import Enum
-from app import list_navigate
 from imports import amount
 import re
-from imgui_bundle import portable_file_dialogs as pfd #type: ignore
-from imgui_bundle import imgui, imgui_ctx
+import json
+import operator
+import numpy as np
 from console import log
-from vjf import VID, FileSlot, Format, save, load, FormatMap
+from vjf import VID, Format, FormatMap
+from table import Transactions, to_amount
+from profiling import timed
+
+#* Entry predicate, callable on a single entry dict or evaluated over a whole table at once with mask()
+class Predicate:
+	def __init__(self, func = None):
+		self.func = func
+
+	def __call__(self, entry : dict) -> bool:
+		return self.func(entry) if self.func else False
+
+	#* default is one call per entry selected by `within`, subclasses work on whole columns
+	def mask(self, entries : Transactions, within : np.ndarray) -> np.ndarray:
+		mask = np.zeros(len(entries), dtype=bool)
+		if self.func:
+			rows = np.flatnonzero(within)
+			mask[rows] = np.fromiter((bool(self.func(entries.row(i))) for i in rows), dtype=bool, count=len(rows))
+		return mask
+
+class RegexPredicate(Predicate):
+	def __init__(self, pattern : re.Pattern, column : str):
+		super().__init__()
+		self.pattern : re.Pattern = pattern
+		self.column : str = column
+
+	def __call__(self, entry : dict) -> bool:
+		return self.pattern.search(entry[self.column]) is not None
+
+	def mask(self, entries : Transactions, within : np.ndarray) -> np.ndarray:
+		return within & entries.categorical(self.column).map(lambda v: self.pattern.search(v) is not None)
+
+class ComparisonPredicate(Predicate):
+	operators = {
+		"==" : operator.eq,
+		"!=" : operator.ne,
+		">=" : operator.ge,
+		"<=" : operator.le,
+		">" : operator.gt,
+		"<" : operator.lt,
+	}
+
+	def __init__(self, op, operand : float):
+		super().__init__()
+		self.op = op
+		self.operand : float = operand
+		#* bound in cents for the amount column, as an exact integer whenever the operand is a whole number of cents
+		self.threshold : int | float = round(operand * 100) if abs(operand * 100 - round(operand * 100)) < 1e-6 else operand * 100
+
+	def __call__(self, entry : dict) -> bool:
+		return self.op(amount(entry), self.operand)
+
+	def mask(self, entries : Transactions, within : np.ndarray) -> np.ndarray:
+		return within & self.op(entries.amount, self.threshold)
+
+class MovementTargetPredicate(Predicate):
+	def __init__(self, pattern : re.Pattern):
+		super().__init__()
+		self.pattern : re.Pattern = pattern
+
+	def __call__(self, entry : dict) -> bool:
+		return self.pattern.search(entry["label_in"]) is not None or self.pattern.search(entry["label_out"]) is not None
+
+	def mask(self, entries : Transactions, within : np.ndarray) -> np.ndarray:
+		match = lambda v: self.pattern.search(v) is not None
+		return within & (entries["label_in"].map(match) | entries["label_out"].map(match))
 
 class Category:
-	def __init__(self, name, predicate = lambda _: False, sub = []):
+	def __init__(self, name, predicate : Predicate = None, sub = []):
 		self.name = name
-		self.predicate = predicate
+		self.predicate : Predicate = predicate if isinstance(predicate, Predicate) else Predicate(predicate)
 		self.sub = sub
 		if self.sub:
 			self.sub.append(Category(name + ".other"))
 		self.active = True
 
-def categorise(parent_category : str, entries: list[dict], categories : list[Category] = []) -> dict:
-	analysis = dict()
-	unused_entries = entries.copy()
+	def mask(self, entries : Transactions, within : np.ndarray) -> np.ndarray:
+		return self.predicate.mask(entries, within)
+
+#* Entry masks of every category in the tree, flattened by name
+def categorise_masks(parent_category : str, entries : Transactions, categories : list[Category], within : np.ndarray) -> dict[str, np.ndarray]:
+	masks = dict()
+	unused = within.copy()
 	for cat in categories:
-		sub_entries = [e for e in entries if cat.predicate(e)]
-		analysis |= { cat.name : sum(amount(e) for e in sub_entries) } | categorise(cat.name, sub_entries, cat.sub)
-		unused_entries = [e for e in unused_entries if e not in sub_entries]
+		masks[cat.name] = cat.mask(entries, within)
+		masks |= categorise_masks(cat.name, entries, cat.sub, masks[cat.name])
+		unused &= ~masks[cat.name]
 	if parent_category != "" and categories: #* last category is always "*.other" if has parent & not empty
-		analysis[categories[-1].name] = sum(amount(e) for e in unused_entries) if unused_entries else 0
-	return analysis
+		masks[categories[-1].name] = unused
+	return masks
+
+@timed("categorise")
+def categorise(parent_category : str, entries : Transactions, categories : list[Category] = []) -> dict:
+	masks = categorise_masks(parent_category, entries, categories, np.ones(len(entries), dtype=bool))
+	return { name : to_amount(int(entries.amount[mask].sum())) for name, mask in masks.items() }
 
 class CategoryBlueprint:
 
@@ -64,44 +139,39 @@ class CategoryBlueprint:
 			[CategoryBlueprint.from_dict(sub) for sub in dct["sub"]]
 		)
 
+#* Compiled predicates are shared by every tree built from an identical filter config
+#* least recently used first, bounded since every intermediate config typed in the editor gets compiled
+predicate_cache : OrderedDict[str, Predicate] = OrderedDict()
+predicate_cache_size : int = 256
+
+def compile_predicate(blueprint : CategoryBlueprint) -> Predicate:
+	key = json.dumps([blueprint.filter.name, blueprint.config])
+	if key in predicate_cache:
+		predicate_cache.move_to_end(key)
+		return predicate_cache[key]
+	predicate = Predicate()
+	try:
+		match blueprint.filter:
+			case CategoryBlueprint.Filter.Regex:
+				assert blueprint.config[1] in Transactions.text_fields, f"unknown column '{blueprint.config[1]}'" # regexes only match the text columns
+				predicate = RegexPredicate(re.compile(blueprint.config[0]), blueprint.config[1]) # config is tuple[str, str]
+			case CategoryBlueprint.Filter.Comparison:
+				predicate = ComparisonPredicate(ComparisonPredicate.operators[blueprint.config[0]], float(blueprint.config[1])) # config is tuple[str, float]
+			case CategoryBlueprint.Filter.MovementTarget:
+				predicate = MovementTargetPredicate(re.compile(blueprint.config)) # config is str
+			case CategoryBlueprint.Filter.Custom:
+				predicate = Predicate(eval("lambda entry: " + blueprint.config))
+	except Exception as e:
+		log("default", "category", f"invalid {blueprint.filter.name} filter for {blueprint.name}: {blueprint.config} ({e})")
+		return Predicate()
+	predicate_cache[key] = predicate
+	if len(predicate_cache) > predicate_cache_size:
+		predicate_cache.popitem(last=False)
+	return predicate
+
 def build_category_tree(blueprint : CategoryBlueprint) -> Category:
-	predicate = lambda _: False
-	match blueprint.filter:
-		case CategoryBlueprint.Filter.Regex:
-			predicate = lambda e: re.search(blueprint.config[0], e[blueprint.config[1]]) != None # config is tuple[str, str]
-		case CategoryBlueprint.Filter.Comparison:
-			match blueprint.config[0]:
-				case "==":
-					predicate = lambda e: amount(e) == blueprint.config[1] # config is numerical
-				case "!=":
-					predicate = lambda e: amount(e) != blueprint.config[1] # config is numerical
-				case ">=":
-					predicate = lambda e: amount(e) >= blueprint.config[1] # config is numerical
-				case "<=":
-					predicate = lambda e: amount(e) <= blueprint.config[1] # config is numerical
-				case ">":
-					predicate = lambda e: amount(e) > blueprint.config[1] # config is numerical
-				case "<":
-					predicate = lambda e: amount(e) < blueprint.config[1] # config is numerical
-		case CategoryBlueprint.Filter.MovementTarget:
-			predicate = lambda e: re.search(blueprint.config, e["label_in"]) != None or re.search(blueprint.config, e["label_out"]) != None # config is str
-		case CategoryBlueprint.Filter.Custom:
-			res = None
-			try:
-				res = eval("lambda entry: " + blueprint.config)
-			except:
-				pass
-			if res:
-				predicate = res
-			else:
-				log("default", "category", f"invalid custom predicate for {blueprint.name}: lambda entry: {blueprint.config}")
-				predicate = lambda _: False
 	subs = [build_category_tree(sub) for sub in blueprint.sub]
-	return Category(blueprint.name, predicate, subs)
-
-def table_push_column(id):
-	imgui.table_next_column()
-	return imgui_ctx.push_id(id)
+	return Category(blueprint.name, compile_predicate(blueprint), subs)
 
 FormatMap["bankviz-category"] = Format(
 	id="bankviz-category",
@@ -109,254 +179,3 @@ FormatMap["bankviz-category"] = Format(
 	parser=lambda data, _, __: [CategoryBlueprint.from_dict(d) for d in data],
 	serialiser=lambda cat, _: [c.to_dict() for c in cat]
 )
-
-class UI:
-	def __init__(self):
-		self.slot : FileSlot = FileSlot(path="unsaved.json", format_id="bankviz-category", content=[])
-		self.blueprints : list[CategoryBlueprint] = self.slot.content
-		self.categories : list[Category] = []
-		self.file_op = None
-		self.file_op_target = None
-		self.selection_blueprints = None
-		self.changed_categories = False
-
-	class FileOp(Enum):
-		LOAD = 0
-		SAVE = 1
-
-	# def add_blueprints(self, categories : list[CategoryBlueprint]):
-	# 	self.blueprints.extend(categories)
-	# 	self.slot.dirty = True
-	# 	self.selection_blueprints = self.blueprints[-1]
-
-	def add_sub_blueprints(self, destination : list[CategoryBlueprint], categories : list[CategoryBlueprint]):
-		destination.extend(categories)
-		self.slot.dirty = True
-		self.selection_blueprints = destination[-1]
-
-	def remove_blueprint(self, location : list[CategoryBlueprint], blueprint : CategoryBlueprint):
-		location.remove(blueprint)
-		self.slot.dirty = True
-		if self.selection_blueprints == blueprint:
-			self.selection_blueprints = None
-
-	def load_category(self, destination = None) -> CategoryBlueprint:
-		self.file_op = (UI.FileOp.LOAD, pfd.open_file("Select category file", filters=["*.json"]))
-		self.file_op_target = destination
-		if not self.file_op_target:
-			self.file_op_target = self.blueprints
-
-	def save_category(self, blueprints : list[CategoryBlueprint] = None) -> None:
-		self.file_op = (UI.FileOp.SAVE, pfd.save_file("Save category", "-".join([cat.name for cat in blueprints]) + ".json", filters=["*.json"]))
-		self.file_op_target = blueprints
-		if not self.file_op_target:
-			self.file_op_target = self.blueprints
-
-	def use_category(self, category : CategoryBlueprint) -> bool:
-		self.categories.append(build_category_tree(category))
-		self.changed_categories = True
-		return True
-
-	def use_all_categories(self) -> bool:
-		for blueprint in self.blueprints:
-			self.use_category(blueprint)
-		return True
-
-	def reset_used(self) -> None:
-		self.categories = []
-		self.changed_categories = True
-
-	def menu(self, title : str):
-		self.changed_categories = False
-		with imgui_ctx.begin_menu(title, True) as menu:
-			if menu:
-				if imgui.menu_item("Load", None, None)[0]:
-					self.load_category()
-				if not self.categories:
-					imgui.begin_disabled()
-				if imgui.menu_item("Save", None, None)[0]:
-					self.save_category(self.categories)
-				if not self.categories:
-					imgui.end_disabled()
-				if imgui.menu_item("Use All", None, None)[0]:
-					self.use_all_categories()
-				if imgui.menu_item("Reset Used", None, None)[0]:
-					self.reset_used()
-
-	def draw(self, title : str = "Categories") -> tuple[bool, list[Category]]:
-		with imgui_ctx.begin(title) as window:
-			if window:
-				if self.file_op:
-					match self.file_op[0]:
-						case UI.FileOp.LOAD:
-							if self.file_op[1].ready():
-								filepaths = self.file_op[1].result()
-								for filepath in filepaths:
-									content : list[CategoryBlueprint] = None
-									if self.file_op_target == self.slot.content:
-										content = self.slot.load(path_override=filepath, format_override="bankviz-category")
-									else:
-										content, _, _ = load(filepath, expected_fmt=FormatMap["bankviz-category"])
-										self.slot.dirty = True
-									if content:
-										self.file_op_target.extend(content)
-										self.selection_blueprints = self.file_op_target[-1]
-								self.file_op = None
-								self.file_op_target = None
-						case UI.FileOp.SAVE:
-							if self.file_op[1].ready():
-								filepath = self.file_op[1].result()
-								if (filepath):
-									save(filepath, FormatMap["bankviz-category"], self.file_op_target)
-								self.file_op = None
-								self.file_op_target = None
-
-				with imgui_ctx.begin_table("##category_sets", 3, flags=imgui.TableFlags_.resizable):
-					with table_push_column("##Used categories column"):
-						if imgui.button("Reset"):
-							self.categories = []
-							self.changed_categories = True
-						with imgui_ctx.begin_list_box("##blueprints", imgui.get_content_region_avail()):
-							with imgui_ctx.begin_table("##blueprints content", 2, flags=imgui.TableFlags_.resizable):
-								for category in self.categories:
-									imgui.table_next_row()
-									with imgui_ctx.push_id(category.name):
-										imgui.table_next_column()
-										imgui.text(category.name)
-										imgui.table_next_column()
-										if imgui.button("X"):
-											self.categories.remove(category)
-											self.changed_categories = True
-
-					with table_push_column("##category blueprint hierarchy column"):
-						imgui.text(self.slot.path + (" ·" if self.slot.dirty else ''))
-						if imgui.button("Load"):
-							self.load_category(destination=self.blueprints)
-						imgui.same_line()
-						if imgui.button("Save"):
-							self.save_category(self.blueprints)
-						imgui.same_line()
-						if imgui.button("Use all"):
-							self.changed_categories = self.use_all_categories()
-						imgui.same_line()
-						if imgui.button("Reset"):
-							self.blueprints = []
-						with imgui_ctx.begin_list_box("##hierachy", imgui.get_content_region_avail()):
-
-							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.s) and self.selected_import.dirty:
-								self.save_category(self.blueprints)
-							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.l):
-								self.load_category(self.selection_blueprints.sub if self.selection_blueprints else self.blueprints)
-							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.n):
-								self.add_sub_blueprints(self.selection_blueprints.sub if self.selection_blueprints else self.blueprints, [CategoryBlueprint()])
-							if imgui.is_window_focused() and imgui.is_key_pressed(imgui.Key.escape):
-								self.selection_blueprints = None
-							if imgui.is_window_focused() and imgui.is_key_pressed(imgui.Key.delete) and self.selection_blueprints != None:
-								def find_parent_rec(root : list[CategoryBlueprint], blueprint : CategoryBlueprint) -> CategoryBlueprint:#* this is stupid cause its a full tree walk, inefficient as hell, but at least it works
-									if blueprint in root:
-										return root
-									for bp in root:
-										result = find_parent_rec(bp.sub, blueprint)
-										if result:
-											return result
-									return None
-								self.remove_blueprint(find_parent_rec(self.blueprints, self.selection_blueprints), self.selection_blueprints)
-
-							with imgui_ctx.begin_table("##hierarchy content", 2, flags=imgui.TableFlags_.resizable | imgui.TableFlags_.borders_inner):
-								def recursive_blueprints_edit(blueprints : list[CategoryBlueprint], parent : CategoryBlueprint | None = None, applied_key_selection : bool = False) -> bool:
-									changed_rec = False
-									index_selected = blueprints.index(self.selection_blueprints) if self.selection_blueprints and self.selection_blueprints in blueprints else -1
-									if not applied_key_selection and imgui.is_window_focused() and index_selected >= 0:
-										index_selected, changed = list_navigate(index_selected, len(blueprints))
-										if changed:
-											self.selection_blueprints = blueprints[index_selected]
-											applied_key_selection = True
-										if imgui.is_key_pressed(imgui.Key.left_arrow) and parent:
-											self.selection_blueprints = parent
-											applied_key_selection = True
-										if imgui.is_key_pressed(imgui.Key.right_arrow) and len(self.selection_blueprints.sub) > 0:
-											applied_key_selection = True
-											self.selection_blueprints = self.selection_blueprints.sub[0]
-									for blueprint, index in zip(blueprints, range(len(blueprints))):
-										with imgui_ctx.push_id(index):
-											imgui.table_next_row()
-											imgui.table_next_column()
-											_, selected = imgui.selectable(blueprint.name, p_selected=self.selection_blueprints == blueprint)
-											if selected:
-												self.selection_blueprints = blueprint
-											imgui.table_next_column()
-											if imgui.button("+"):
-												self.add_sub_blueprints(blueprint.sub, [CategoryBlueprint()])
-											imgui.same_line()
-											if imgui.button("Load"):
-												self.load_category(blueprint.sub)
-											imgui.same_line()
-											if imgui.button("Use"):
-												changed_rec = self.use_category(blueprint)
-											imgui.same_line()
-											if imgui.button("X"):
-												blueprints.remove(blueprint)
-												self.slot.dirty = True
-												if self.selection_blueprints == blueprint:
-													self.selection_blueprints = None
-											imgui.indent()
-											changed_rec |= recursive_blueprints_edit(blueprint.sub, blueprint, applied_key_selection)
-											imgui.unindent()
-									return changed_rec
-								self.changed_categories |= recursive_blueprints_edit(self.blueprints)
-								imgui.table_next_row()
-								imgui.table_next_column()
-								if imgui.button("+"):
-									self.slot.dirty = True
-									self.blueprints.append(CategoryBlueprint())
-									self.selection_blueprints = self.blueprints[-1]
-								imgui.same_line()
-								if imgui.button("Load"):
-									self.load_category(self.blueprints)
-
-					with table_push_column("##category blueprint details column"):
-						if self.selection_blueprints:
-							changed_name, self.selection_blueprints.name = imgui.input_text("Name", self.selection_blueprints.name)
-							if changed_name:
-								self.slot.dirty = True
-							changed_filter, idx = imgui.combo("Filter", self.selection_blueprints.filter.value, [f.name for f in list(CategoryBlueprint.Filter)])
-							self.selection_blueprints.filter = CategoryBlueprint.Filter(idx)
-							imgui.text("Filter Config")
-							match self.selection_blueprints.filter:
-								case CategoryBlueprint.Filter.Regex:
-									if changed_filter:
-										self.selection_blueprints.config = ("", "")
-									changed_regex, reg = imgui.input_text("Regex", self.selection_blueprints.config[0])
-									changed_column, col = imgui.input_text("Column", self.selection_blueprints.config[1])
-									self.selection_blueprints.config = (reg, col)
-									if changed_regex or changed_column:
-										self.slot.dirty = True
-								case CategoryBlueprint.Filter.Comparison:
-									if changed_filter:
-										self.selection_blueprints.config = ("==", 0)
-									comparators = ["==", "!=", ">", "<", ">=", "<="]
-									changed_comp, comp_idx = imgui.combo("Comparison", comparators.index(self.selection_blueprints.config[0]), comparators)
-									changed_op, comp_operand = imgui.input_float("Operand", self.selection_blueprints.config[1])
-									if changed_comp or changed_op:
-										self.slot.dirty = True
-									self.selection_blueprints.config = (comparators[comp_idx], comp_operand)
-								case CategoryBlueprint.Filter.MovementTarget:
-									if changed_filter:
-										self.selection_blueprints.config = ""
-									changed_regex, self.selection_blueprints.config = imgui.input_text("Regex", self.selection_blueprints.config)
-									if changed_regex:
-										self.slot.dirty = True
-								case CategoryBlueprint.Filter.Custom:
-									if changed_filter:
-										self.selection_blueprints.config = "False"
-									changed_pred, self.selection_blueprints.config = imgui.input_text("Predicate", self.selection_blueprints.config)
-									if changed_pred:
-										self.slot.dirty = True
-						else:
-							imgui.begin_disabled()
-							imgui.input_text("Name", "------------")
-							imgui.combo("Filter", 0, list(f.name for f in CategoryBlueprint.Filter))
-							imgui.input_text("Config", "")
-							imgui.end_disabled()
-
-		return self.changed_categories, self.categories
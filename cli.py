@@ -0,0 +1,99 @@
+import argparse
+import sys
+from os import path
+import console
+from console import LogEntry as Log
+from vjf import load, FormatMap
+from schedule import Granularity
+from imports import Import, shutdown_ingest_pool
+from category import Category, CategoryBlueprint, build_category_tree
+from analysis import Mode, analyse, export_reports, dump_formats
+
+#* Headless analysis runner, same pipeline as the app without any window (nor imgui import)
+#* python cli.py --categories cats.json --granularity Month imports/*.json
+
+def load_categories(filename : str) -> list[Category] | None:
+	res = load(filename, expected_fmt=FormatMap["bankviz-category"])
+	if res is None:
+		return None
+	blueprints : list[CategoryBlueprint] = res[0]
+	return [build_category_tree(b) for b in blueprints]
+
+def load_import(filename : str) -> Import | None:
+	res = load(filename, expected_fmt=FormatMap["bankviz-import"])
+	if res is None:
+		return None
+	imp : Import = res[0]
+	imp.load_entries()
+	return imp
+
+def output_name(import_file : str, granularity : Granularity, count : int, mode : Mode, window : int, fmt : str, output_dir : str | None) -> str:
+	suffix = "" if mode == Mode.Sections else f"-{mode.name}{window if mode == Mode.Rolling else ''}"
+	name = f"{path.splitext(path.basename(import_file))[0]}-{granularity.name}-{count}{suffix}{fmt}"
+	return path.join(output_dir if output_dir else path.dirname(path.abspath(import_file)), name)
+
+#* console entries are only shown in the app, print the ones worth seeing on a terminal
+def flush_log(printed : int, min_level : Log.Level) -> int:
+	console.drain()
+	channel = console.channels["default"]
+	for entry in channel.since(printed):
+		if console.level_ordinals[entry.level] >= console.level_ordinals[min_level]:
+			print(f"[{entry.level.name}] {entry.origin} : {entry.message}", file=sys.stderr)
+	return channel.sequence
+
+def main(argv : list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(prog="bviz", description="Categorical analysis of bankviz imports, without the UI")
+	parser.add_argument("imports", nargs="+", help="bankviz-import json files")
+	parser.add_argument("-c", "--categories", required=True, help="bankviz-category json file")
+	parser.add_argument("-g", "--granularity", choices=[g.name for g in Granularity], default=Granularity.Month.name)
+	parser.add_argument("-n", "--count", type=int, default=1, help="granularity units per section")
+	parser.add_argument("-m", "--mode", choices=[m.name for m in Mode], default=Mode.Sections.name)
+	parser.add_argument("-w", "--window", type=int, default=3, help="rolling window, in granularity units")
+	parser.add_argument("-f", "--format", choices=list(dump_formats.keys()), default=".csv")
+	parser.add_argument("-o", "--output-dir", default=None, help="defaults to the directory of each import")
+	parser.add_argument("-v", "--verbose", action="store_true")
+	parser.add_argument("--log-file", default=None, help="also write every log entry to this (size rotated) file")
+	args = parser.parse_args(argv)
+
+	if args.log_file:
+		console.open_file_sink(args.log_file)
+	try:
+		return run(args)
+	finally:
+		shutdown_ingest_pool()
+		console.close_file_sink()
+
+def run(args : argparse.Namespace) -> int:
+	min_level = Log.Level.DEBUG if args.verbose else Log.Level.WARN
+	granularity = Granularity[args.granularity]
+	count = max(1, args.count)
+	mode = Mode[args.mode]
+	window = max(1, args.window)
+	printed = 0
+
+	categories = load_categories(args.categories)
+	printed = flush_log(printed, min_level)
+	if categories is None:
+		return 1
+
+	failed = 0
+	for import_file in args.imports:
+		imp = load_import(import_file)
+		if imp is None:
+			printed = flush_log(printed, min_level)
+			failed += 1
+			continue
+		output = output_name(import_file, granularity, count, mode, window, args.format, args.output_dir)
+		try:
+			reports = analyse(imp, categories, granularity, count, mode, window)
+			export_reports(reports, output)
+			console.log("default", "cli", f"{import_file} : {len(reports)} reports dumped", Log.Level.INFO)
+			print(output)
+		except Exception as e:
+			console.log("default", "cli", f"failed to analyse {import_file} : {e}", Log.Level.ERR)
+			failed += 1
+		printed = flush_log(printed, min_level)
+	return 1 if failed else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,116 +1,141 @@
-from copy import copy
+from collections import deque
 from enum import Enum
-import random
-import string
-from imgui_bundle import ImVec4, imgui, imgui_ctx
 from datetime import datetime
+from queue import SimpleQueue
 
 class LogEntry:
 
 	class Level(Enum):
-		DEBUG = ImVec4(0, 1, 0, 1)
-		INFO = ImVec4(1, 1, 1, 1)
-		WARN = ImVec4(1, 1, 0, 1)
-		ERR = ImVec4(1, 0, 0, 1)
+		#* values are the rgba display colors
+		DEBUG = (0, 1, 0, 1)
+		INFO = (1, 1, 1, 1)
+		WARN = (1, 1, 0, 1)
+		ERR = (1, 0, 0, 1)
 
 	def __init__(self, timestamp : datetime, level : Level, origin : str, message : str):
 		self.timestamp : datetime = timestamp
 		self.level : LogEntry.Level = level
 		self.origin : str = origin
 		self.message : str = message
+		self.sequence : int = None #* set by the channel holding it
+		self.timestamp_text : str = None
 
+	#* formatted on first display only, entries are immutable once logged
+	def timestamp_str(self) -> str:
+		if self.timestamp_text is None:
+			self.timestamp_text = self.timestamp.strftime("[%Y/%m/%d-%H:%M:%S]")
+		return self.timestamp_text
+
+#* position of each level in severity order, filters compare integers instead of searching the enum
+level_ordinals : dict[LogEntry.Level, int] = { level : i for i, level in enumerate(LogEntry.Level) }
+
+#* Fixed capacity ring of the latest entries, appending past the capacity overwrites the oldest one
 class Channel:
 	def __init__(self, size : int, min_level : LogEntry.Level = LogEntry.Level.INFO, max_level : LogEntry.Level = LogEntry.Level.ERR):
-		self.entries : list[LogEntry] = copy([])
+		self.ring : list[LogEntry] = [None] * size
 		self.min_level : LogEntry.Level = min_level
 		self.max_level : LogEntry.Level = max_level
+		self.min_ordinal : int = level_ordinals[min_level]
+		self.max_ordinal : int = level_ordinals[max_level]
 		self.size : int = size
+		self.sequence : int = 0 #* number of entries ever logged, the next entry gets it as its sequence number
+		self.first : int = 0 #* sequence number of the oldest entry still held
 
 	def log(self, entry : LogEntry):
-		idx_min = list(LogEntry.Level).index(self.min_level)
-		idx_max = list(LogEntry.Level).index(self.max_level)
-		idx_entry = list(LogEntry.Level).index(entry.level)
-		if idx_entry < idx_min or idx_entry > idx_max:
+		if not self.min_ordinal <= level_ordinals[entry.level] <= self.max_ordinal:
 			return
-		self.entries.append(entry)
-		if len(self.entries) > self.size:
-			self.entries = self.entries[-self.size:]
+		entry.sequence = self.sequence
+		self.ring[self.sequence % self.size] = entry
+		self.sequence += 1
+		if self.sequence - self.first > self.size:
+			self.first += 1
+
+	def __len__(self) -> int:
+		return self.sequence - self.first
+
+	#* 0 is the oldest held entry, negative indices count from the latest
+	def __getitem__(self, index : int) -> LogEntry:
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError(index)
+		return self.ring[(self.first + index) % self.size]
+
+	def __iter__(self):
+		return (self[i] for i in range(len(self)))
+
+	#* entries logged from sequence number `sequence` on, that are still held
+	def since(self, sequence : int) -> list[LogEntry]:
+		return [self[i] for i in range(max(0, sequence - self.first), len(self))]
+
+	@property
+	def entries(self) -> list[LogEntry]:
+		return list(self)
+
+	def clear(self) -> None:
+		self.ring = [None] * self.size
+		self.first = self.sequence
 
 channels : dict[str, Channel] = {
 	"default" : Channel(1000, min_level=LogEntry.Level.DEBUG, max_level=LogEntry.Level.ERR)
 }
 
+#* Entries logged from any thread wait here until the UI thread drains them into their channel
+#* bounded like the channel itself, entries that would be overwritten before being shown are dropped while nobody drains
+pending : dict[str, deque] = {}
+
+#* Optional file mirror, records are written by a QueueListener thread (queue, listener, record type)
+file_sink : tuple = None
+
 def log(channel : str, origin : str, message : str, level : LogEntry.Level = LogEntry.Level.INFO):
-	if channel not in channels:
-		channels[channel] = Channel(1000)
-	channels[channel].log(LogEntry(datetime.now(), level, origin, message))
-
-class UI:
-
-	def __init__(self):
-		self.selected_tab : str = "default"
-		self.auto_scroll_on_add : bool = True
-		self.last_timestamp : datetime = datetime.now()
-		self.displayed_log_level : list[LogEntry.Level] = list(LogEntry.Level)
-
-	def menu(self, title : str) -> bool:
-		force_scroll = False
-		with imgui_ctx.begin_menu(title, True) as menu:
-			if menu:
-				if imgui.menu_item("Clear", None, None)[0]:
-					force_scroll = True
-					channels[self.selected_tab].entries = []
-				if imgui.menu_item("Clear All", None, None)[0]:
-					force_scroll = True
-					for channel in channels.values():
-						channel.entries = []
-				self.auto_scroll_on_add = imgui.menu_item("Auto Scroll", None, self.auto_scroll_on_add)[1]
-				for level in LogEntry.Level:
-					if imgui.menu_item(f"{level}", None, level in self.displayed_log_level)[0]:
-						force_scroll = True
-						if level in self.displayed_log_level:
-							self.displayed_log_level.remove(level)
-						else:
-							self.displayed_log_level.append(level)
-		return force_scroll
-
-	def draw_console(self, title : str, force_scroll : bool = False) -> str:
-		with imgui_ctx.begin(title) as window:
-			if window:
-				# if imgui.button("Random log"):
-				# 	log("default", "random", ''.join(random.choices(string.ascii_uppercase + string.digits, k=random.randint(1, 100))), random.choice(list(LogEntry.Level)))
-				with imgui_ctx.tree_node("Log levels") as tree:
-					if tree:
-						for level in LogEntry.Level:
-							if imgui.checkbox(f"{level}", level in self.displayed_log_level)[0]:
-								force_scroll = True
-								if level in self.displayed_log_level:
-									self.displayed_log_level.remove(level)
-								else:
-									self.displayed_log_level.append(level)
-				with imgui_ctx.begin_tab_bar("##log tabs"):
-					for tab in channels.keys():
-						with imgui_ctx.begin_tab_item(tab) as tab_item:
-							if tab_item:
-								# force_scroll = True
-								self.selected_tab = tab
-				with imgui_ctx.begin_list_box("##log", imgui.get_content_region_avail()):
-					with imgui_ctx.begin_table('##log entry', column=3, flags=imgui.TableFlags_.sizing_fixed_fit | imgui.TableFlags_.borders_inner):
-						imgui.table_setup_column("##timestamps", imgui.TableColumnFlags_.width_fixed)
-						imgui.table_setup_column("##origin", imgui.TableColumnFlags_.width_fixed)
-						imgui.table_setup_column("##message", imgui.TableColumnFlags_.width_stretch)
-						for entry in channels[self.selected_tab].entries:
-							if entry.level not in self.displayed_log_level:
-								continue
-							imgui.table_next_row()
-							with imgui_ctx.push_style_color(imgui.Col_.text, entry.level.value):
-								imgui.table_next_column()
-								imgui.text(entry.timestamp.strftime("[%Y/%m/%d-%H:%M:%S]"))
-								imgui.table_next_column()
-								imgui.text_unformatted(entry.origin)
-								imgui.table_next_column()
-								imgui.text_wrapped(entry.message)
-						if force_scroll or (self.auto_scroll_on_add and channels[self.selected_tab].entries[-1].timestamp > self.last_timestamp):
-							imgui.set_scroll_here_y(1.0)
-							self.last_timestamp = channels[self.selected_tab].entries[-1].timestamp if len(channels[self.selected_tab].entries) > 0 else self.last_timestamp
-		return self.selected_tab
+	entry = LogEntry(datetime.now(), level, origin, message)
+	queue = pending.get(channel)
+	if queue is None:
+		queue = pending.setdefault(channel, deque(maxlen=channels[channel].size if channel in channels else 1000))
+	queue.append(entry)
+	sink = file_sink
+	if sink is not None:
+		sink[0].put(sink_record(sink[2], channel, entry))
+
+#* Moves pending entries into their channel, only call from the thread owning the channels (the UI thread)
+def drain(limit : int = 10000) -> int:
+	drained = 0
+	for channel, queue in list(pending.items()):
+		if channel not in channels:
+			channels[channel] = Channel(queue.maxlen)
+		while queue and drained < limit:
+			channels[channel].log(queue.popleft())
+			drained += 1
+	return drained
+
+sink_levels : dict[LogEntry.Level, int] = { LogEntry.Level.DEBUG : 10, LogEntry.Level.INFO : 20, LogEntry.Level.WARN : 30, LogEntry.Level.ERR : 40 } #* logging module levels
+
+def sink_record(record_type : type, channel : str, entry : LogEntry):
+	record = record_type(channel, sink_levels[entry.level], entry.origin, 0, entry.message, None, None)
+	record.created = entry.timestamp.timestamp()
+	record.msecs = entry.timestamp.microsecond // 1000
+	record.origin = entry.origin
+	return record
+
+#* Mirror every entry logged from now on to a size rotated file, formatting & writing happen on the listener thread
+def open_file_sink(filename : str, max_bytes : int = 1 << 20, backup_count : int = 3) -> None:
+	global file_sink
+	import logging
+	from logging.handlers import QueueListener, RotatingFileHandler
+	close_file_sink()
+	handler = RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+	handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s/%(origin)s : %(message)s"))
+	queue = SimpleQueue()
+	listener = QueueListener(queue, handler)
+	listener.start()
+	file_sink = (queue, listener, logging.LogRecord)
+
+def close_file_sink() -> None:
+	global file_sink
+	if file_sink is None:
+		return
+	_, listener, _ = file_sink
+	file_sink = None
+	listener.stop() #* writes what is still queued
+	for handler in listener.handlers:
+		handler.close()
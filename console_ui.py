@@ -0,0 +1,100 @@
+from bisect import bisect_left
+import random
+import string
+from imgui_bundle import ImVec4, imgui, imgui_ctx
+from console import Channel, LogEntry, channels, log, drain
+
+class UI:
+
+	def __init__(self):
+		self.selected_tab : str = "default"
+		self.auto_scroll_on_add : bool = True
+		self.last_sequence : int = 0
+		self.displayed_log_level : list[LogEntry.Level] = list(LogEntry.Level)
+		self.filter_key : tuple = None
+		self.filtered : list[int] = [] #* sequence numbers of the displayed entries, in order
+		self.filtered_until : int = 0 #* channel sequence number the filtered index is up to date with
+
+	#* Sequence numbers of the entries passing the level filter, only new entries are filtered each frame
+	def filtered_entries(self, channel : Channel) -> tuple[list[int], int]:
+		key = (self.selected_tab, frozenset(self.displayed_log_level))
+		if key != self.filter_key:
+			self.filter_key, self.filtered, self.filtered_until = key, [], channel.first
+		if self.filtered_until < channel.sequence:
+			levels = self.filter_key[1]
+			self.filtered.extend(e.sequence for e in channel.since(self.filtered_until) if e.level in levels)
+			self.filtered_until = channel.sequence
+		#* evicted entries are skipped from the front, and only dropped once they make up most of the index
+		start = bisect_left(self.filtered, channel.first)
+		if start > len(self.filtered) // 2:
+			del self.filtered[:start]
+			start = 0
+		return self.filtered, start
+
+	def menu(self, title : str) -> bool:
+		force_scroll = False
+		with imgui_ctx.begin_menu(title, True) as menu:
+			if menu:
+				if imgui.menu_item("Clear", None, None)[0]:
+					force_scroll = True
+					channels[self.selected_tab].clear()
+				if imgui.menu_item("Clear All", None, None)[0]:
+					force_scroll = True
+					for channel in channels.values():
+						channel.clear()
+				self.auto_scroll_on_add = imgui.menu_item("Auto Scroll", None, self.auto_scroll_on_add)[1]
+				for level in LogEntry.Level:
+					if imgui.menu_item(f"{level}", None, level in self.displayed_log_level)[0]:
+						force_scroll = True
+						if level in self.displayed_log_level:
+							self.displayed_log_level.remove(level)
+						else:
+							self.displayed_log_level.append(level)
+		return force_scroll
+
+	def draw_console(self, title : str, force_scroll : bool = False) -> str:
+		drain()
+		with imgui_ctx.begin(title) as window:
+			if window:
+				# if imgui.button("Random log"):
+				# 	log("default", "random", ''.join(random.choices(string.ascii_uppercase + string.digits, k=random.randint(1, 100))), random.choice(list(LogEntry.Level)))
+				with imgui_ctx.tree_node("Log levels") as tree:
+					if tree:
+						for level in LogEntry.Level:
+							if imgui.checkbox(f"{level}", level in self.displayed_log_level)[0]:
+								force_scroll = True
+								if level in self.displayed_log_level:
+									self.displayed_log_level.remove(level)
+								else:
+									self.displayed_log_level.append(level)
+				with imgui_ctx.begin_tab_bar("##log tabs"):
+					for tab in channels.keys():
+						with imgui_ctx.begin_tab_item(tab) as tab_item:
+							if tab_item:
+								# force_scroll = True
+								self.selected_tab = tab
+				with imgui_ctx.begin_list_box("##log", imgui.get_content_region_avail()):
+					with imgui_ctx.begin_table('##log entry', column=3, flags=imgui.TableFlags_.sizing_fixed_fit | imgui.TableFlags_.borders_inner):
+						imgui.table_setup_column("##timestamps", imgui.TableColumnFlags_.width_fixed)
+						imgui.table_setup_column("##origin", imgui.TableColumnFlags_.width_fixed)
+						imgui.table_setup_column("##message", imgui.TableColumnFlags_.width_stretch)
+						channel = channels[self.selected_tab]
+						filtered, start = self.filtered_entries(channel)
+						#* only submit the visible rows, messages are kept on one line so every row has the same height
+						clipper = imgui.ListClipper()
+						clipper.begin(len(filtered) - start)
+						while clipper.step():
+							for index in range(clipper.display_start, clipper.display_end):
+								entry = channel[filtered[start + index] - channel.first]
+								imgui.table_next_row()
+								with imgui_ctx.push_style_color(imgui.Col_.text, ImVec4(*entry.level.value)):
+									imgui.table_next_column()
+									imgui.text_unformatted(entry.timestamp_str())
+									imgui.table_next_column()
+									imgui.text_unformatted(entry.origin)
+									imgui.table_next_column()
+									imgui.text_unformatted(entry.message)
+						if force_scroll or (self.auto_scroll_on_add and channels[self.selected_tab].sequence > self.last_sequence):
+							imgui.set_scroll_here_y(1.0)
+							self.last_sequence = channels[self.selected_tab].sequence
+		return self.selected_tab
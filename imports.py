@@ -1,13 +1,19 @@
+from concurrent.futures import BrokenExecutor, as_completed
 import csv
 from datetime import datetime
-from enum import Enum
+import hashlib
+import os
 from os import path
-from app import list_navigate
-from schedule import Timespan, Granularity, input_date
-from imgui_bundle import portable_file_dialogs as pfd #type: ignore
-from imgui_bundle import imgui, imgui_ctx
+from typing import TYPE_CHECKING
+import numpy as np
 from console import log, LogEntry as Log
+from schedule import Timespan, Granularity, Sections, section_dates
 from vjf import VID, FormatMap, Format, FileSlot
+from table import Transactions, to_datetime
+from worker import Job
+from profiling import timed
+if TYPE_CHECKING:
+	from concurrent.futures import ProcessPoolExecutor
 
 bank_statement_fields = ["date", "amount", "type", "account", "label_out", "label_in", "tbd", "note"]
 def read_bank_statement(filename) -> list[dict]:
@@ -15,21 +21,138 @@ def read_bank_statement(filename) -> list[dict]:
 		reader = csv.DictReader(file, fieldnames=bank_statement_fields, delimiter=';')
 		return [row for row in reader]
 
-def load_entries(files : list[str], flt : Timespan | None = None) -> list[dict]:
-	entries = []
-	for f in files:
-		entries.extend(read_bank_statement(f))
+#* Parsed statements are cached on disk as packed columns, bump when the parsing output changes
+parser_version : int = 5
+#* BVIZ_CACHE_DIR overrides the location, set but empty disables the cache
+statement_cache_dir : str | None = (os.environ["BVIZ_CACHE_DIR"] or None) if "BVIZ_CACHE_DIR" in os.environ else path.join(os.environ.get("XDG_CACHE_HOME") or path.join(path.expanduser("~"), ".cache"), "bviz", "statements")
+
+#* one entry per source file (path, version), a newer version of the source overwrites its entry so nothing stale has to be searched for
+def statement_cache_entry(filename : str, cache_dir : str) -> tuple[str, str]:
+	filename = path.abspath(filename)
+	stat = os.stat(filename)
+	source = hashlib.sha1(filename.encode()).hexdigest()[:16]
+	version = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}:{parser_version}".encode()).hexdigest()[:16]
+	return path.join(cache_dir, f"{source}.bvc"), version
+
+def cached_statement(filename : str, cache_dir : str | None = statement_cache_dir) -> Transactions | None:
+	if cache_dir is None:
+		return None
+	try:
+		entry, version = statement_cache_entry(filename, cache_dir)
+		return Transactions.load(entry, version) if path.isfile(entry) else None
+	except Exception:
+		return None
+
+def store_statement(filename : str, entries : Transactions, cache_dir : str | None = statement_cache_dir) -> None:
+	if cache_dir is None:
+		return
+	import tempfile #* only needed on cache misses
+	tmp = None
+	try:
+		entry, version = statement_cache_entry(filename, cache_dir)
+		os.makedirs(cache_dir, exist_ok=True)
+		#* write aside then rename, readers never see a partial entry
+		handle, tmp = tempfile.mkstemp(prefix=".tmp-", dir=cache_dir)
+		os.close(handle)
+		entries.save(tmp, version)
+		os.replace(tmp, entry)
+	except Exception as e:
+		#* the cache is only an accelerator, the statement was still parsed
+		log("default", "imports", f"failed to cache {filename} in {cache_dir} : {e}", Log.Level.DEBUG)
+		if tmp is not None and path.exists(tmp):
+			os.remove(tmp)
+
+#* Parse one statement file (or map it back from the cache), keeping only the entries inside `flt`
+def read_statement(filename : str, flt : Timespan | None = None, cache_dir : str | None = statement_cache_dir) -> Transactions:
+	entries = cached_statement(filename, cache_dir)
+	if entries is None:
+		entries = Transactions.from_rows(read_bank_statement(filename))
+		store_statement(filename, entries, cache_dir)
 	if flt is not None:
-		entries = [e for e in entries if datetime.strptime(e['date'], "%d/%m/%Y") >= flt.begin and datetime.strptime(e['date'], "%d/%m/%Y") <= flt.end]
+		entries = entries.between(flt.begin, flt.end)
 	return entries
 
+#* Process pool for statement parsing, created on first large multi-file load
+ingest_pool : "ProcessPoolExecutor" = None
+#* below this many bytes of statements to parse, spawning the pool's processes costs more than it saves
+parallel_min_bytes : int = 8 << 20
+
+def get_ingest_pool() -> "ProcessPoolExecutor":
+	global ingest_pool
+	if ingest_pool is None:
+		#* multiprocessing is heavy to import & only needed for multi-file loads
+		from concurrent.futures import ProcessPoolExecutor
+		import multiprocessing
+		ingest_pool = ProcessPoolExecutor(max_workers=max(1, min(8, (os.cpu_count() or 1) - 1)), mp_context=multiprocessing.get_context("spawn"))
+	return ingest_pool
+
+#* Stops the pool's worker processes, called at exit rather than leaving it to the interpreter finalisers
+def shutdown_ingest_pool() -> None:
+	global ingest_pool
+	if ingest_pool is not None:
+		ingest_pool.shutdown(wait=True, cancel_futures=True)
+		ingest_pool = None
+
+@timed("load_entries")
+def load_entries(files : list[str], flt : Timespan | None = None, job : Job = None, parallel : bool = True) -> Transactions:
+	tables = [cached_statement(f, statement_cache_dir) for f in files]
+	tables = [t.between(flt.begin, flt.end) if t is not None and flt is not None else t for t in tables]
+	missing = [i for i, t in enumerate(tables) if t is None]
+	if parallel and len(missing) >= 2 and (os.cpu_count() or 1) >= 2 and sum(path.getsize(files[i]) for i in missing) >= parallel_min_bytes:
+		try:
+			load_parallel(files, missing, tables, flt, job)
+		except BrokenExecutor as e: #* BrokenProcessPool, without importing multiprocessing up front
+			#* a crashed worker breaks the whole pool, the next parallel load starts a fresh one
+			log("default", "imports", f"statement parsing pool broke ({e}), parsing sequentially", Log.Level.WARN)
+			shutdown_ingest_pool()
+		missing = [i for i, t in enumerate(tables) if t is None]
+	for done, i in enumerate(missing):
+		tables[i] = read_statement(files[i], flt, statement_cache_dir)
+		if job:
+			job.report((done + 1) / (len(missing) + 1))
+	#* every file is already sorted, so the stable sort in concat only has to merge the runs
+	return Transactions.concat(tables)
+
+#* Only files missing from the cache are worth a trip through the pool, fills `tables` in place
+def load_parallel(files : list[str], missing : list[int], tables : list[Transactions | None], flt : Timespan | None, job : Job = None) -> None:
+	futures = { get_ingest_pool().submit(read_statement, files[i], flt, statement_cache_dir) : i for i in missing }
+	try:
+		for done, future in enumerate(as_completed(futures)):
+			tables[futures[future]] = future.result()
+			if job:
+				job.report((done + 1) / (len(missing) + 1))
+	except BaseException:
+		for future in futures:
+			future.cancel()
+		raise
+
+#* Background task loading the entries of an import, with the dates selected from the sources contents when `flt` is None
+def read_import(job : Job, files : list[str], flt : Timespan | None) -> tuple[datetime, datetime, Transactions]:
+	entries = load_entries(files, flt, job)
+	if flt is not None:
+		return flt.begin, flt.end, entries
+	if len(entries) == 0:
+		return None, None, entries
+	return to_datetime(entries.date[0]), to_datetime(entries.date[-1]), entries
+
+#* Section timespans & the row index where each of them starts, plus a final end index
+@timed("sectionned")
+def section_bounds(entries : Transactions, granularity : Granularity, count : int = 1) -> tuple[Sections, np.ndarray]:
+	if entries is None or len(entries) == 0:
+		return Sections(np.array([], dtype="datetime64[D]"), np.array([], dtype="datetime64[D]")), np.zeros(1, dtype=np.int64)
+	sections = Sections(*section_dates(entries.date[0], entries.date[-1], granularity, count))
+	#* entries are sorted by date & sections are contiguous, so one binary search per section begin partitions everything
+	starts = np.searchsorted(entries.date, sections.begins, side="left")
+	return sections, np.append(starts, len(entries))
+
 class Import:
 
-	def __init__(self, begin : datetime = None, end : datetime = None, files : list[str] = [], entries : list[dict] = []):
+	def __init__(self, begin : datetime = None, end : datetime = None, files : list[str] = [], entries : Transactions = None):
 		self.begin : datetime = begin
 		self.end : datetime = end
 		self.files: list[str] = files
-		self.entries : list[dict] = entries
+		self.entries : Transactions = entries if entries is not None else Transactions.empty()
+		self.loaded : bool = entries is not None #* entries are read from the files separately, see load_entries & imports_ui.UI.request_load
 
 	def to_dict(self, pwd : str, datetime_fmt = "%Y/%m/%d"):
 		if self.begin is None or self.end is None:
@@ -42,15 +165,10 @@ class Import:
 
 	@staticmethod
 	def from_dict(data : dict, pwd : str, datetime_fmt = "%Y/%m/%d"):
-		files = [pwd + '/' + f for f in data['files']]
 		return Import(
 			begin=datetime.strptime(data['begin'], datetime_fmt),
 			end=datetime.strptime(data['end'], datetime_fmt),
-			files=files,
-			entries=load_entries(files=files, flt=Timespan(
-				datetime.strptime(data['begin'], datetime_fmt).replace(hour=0, minute=0, second=0),
-				datetime.strptime(data['end'], datetime_fmt).replace(hour=23, minute=59, second=59),
-			))
+			files=[pwd + '/' + f for f in data['files']],
 		)
 
 	def valid(self) -> bool:
@@ -58,43 +176,40 @@ class Import:
 
 	def load_entries(self):
 		self.entries = load_entries(files=self.files, flt=Timespan(self.begin, self.end) if self.begin and self.end else None)
+		self.loaded = True
 
-	def section(self, timespan : Timespan):
-		return filter(lambda e: e['date'] >= timespan.begin and e['date'] <= timespan.end, self.entries())
+	def section(self, timespan : Timespan) -> Transactions:
+		return self.entries.between(timespan.begin, timespan.end)
 
 	def select_dates_from_contents(self) -> bool:
 		b, e = self.begin, self.end
 		init_dates = self.begin is None or self.end is None
 		entries = load_entries(files=self.files)
-		self.begin = min(datetime.strptime(e['date'], "%d/%m/%Y") for e in entries)
-		self.end = max(datetime.strptime(e['date'], "%d/%m/%Y") for e in entries)
+		if len(entries) == 0:
+			return False
+		self.begin = to_datetime(entries.date[0])
+		self.end = to_datetime(entries.date[-1])
 		changed_dates = init_dates or b != self.begin or e != self.end
 		return changed_dates
 
 	class Section:
-		def __init__(self, timespan : Timespan, entries = []):
+		def __init__(self, timespan : Timespan, entries : Transactions = None, rows : slice = slice(0, 0)):
 			self.timespan = timespan
-			self.entries = entries
+			self.entries = entries if entries is not None else Transactions.empty()
+			self.rows = rows #* index range of the section in the import's entries
+
+	def section_bounds(self, granularity : Granularity, count : int = 1) -> tuple[Sections, np.ndarray]:
+		return section_bounds(self.entries, granularity, count)
 
 	def sectionned(self, granularity : Granularity, count : int = 1) -> list[Section]:
-		#* Create sections (thats a whole lot of discarded parsing, easy perf gain here @OPTI)
-		if self.entries is None or len(self.entries) == 0:
-			return []
-		total_timespan = Timespan(
-			min(datetime.strptime(e['date'], "%d/%m/%Y") for e in self.entries).replace(hour=0, minute=0, second=0),
-			max(datetime.strptime(e['date'], "%d/%m/%Y") for e in self.entries).replace(hour=23, minute=59, second=59)
-		)
-		sections = [Import.Section(t, []) for t in total_timespan.sectionned(granularity, count)]
-		#* Distribute entries in sections
-		for e in self.entries:
-			date = datetime.strptime(e['date'], "%d/%m/%Y")
-			next((s for s in sections if date >= s.timespan.begin and date <= s.timespan.end)).entries.append(e)
-		return sections
+		timespans, bounds = self.section_bounds(granularity, count)
+		return [Import.Section(t, self.entries[b:e], slice(b, e)) for t, b, e in zip(timespans, bounds[:-1], bounds[1:])]
 
 def column(data : list[dict], field : str):
 	return [row[field] for row in data]
 
 #* Extract the amount of money change in a bank entry as a float (french bank uses ',' instead of '.')
+#* only for single entry dicts, tables already hold amounts as integer cents
 def amount(entry : dict) -> float:
 	return float(entry['amount'].replace(',', '.'))
 
@@ -107,293 +222,3 @@ FormatMap["bankviz-import"] = Format(
 	parser=lambda data, _, filepath: Import.from_dict(data, path.dirname(filepath)),
 	serialiser=lambda imp, filepath: imp.to_dict(path.dirname(filepath))
 )
-
-# region UI
-class UI:
-
-	class FileOperation(Enum):
-		NOOP = 0
-		LOAD_IMPORTS = 1
-		SAVE_IMPORTS = 2
-		SECLECT_SOURCES = 3
-
-		def make_noop():
-			return (UI.FileOperation.NOOP, None)
-
-	def __init__(self):
-		self.file_dialog : tuple[UI.FileOperation, pfd.open_file | pfd.save_file] = UI.FileOperation.make_noop()
-		self.file_op_target : FileSlot = None
-		self.imported : list[FileSlot] = []
-		self.selected_import : FileSlot = None
-		self.selected_source_file : str = None
-		self.auto_select_import_dates : bool = True
-		self.changed_selected : bool = False
-
-	def load_imports(self) -> bool:
-		self.file_dialog = (UI.FileOperation.LOAD_IMPORTS, pfd.open_file("Select report file", filters=["*.json"], options=pfd.opt.multiselect))
-
-	def save_import(self, imp : FileSlot) -> bool:
-		self.file_dialog = (UI.FileOperation.SAVE_IMPORTS, pfd.save_file("Save as", imp.path, filters=["*.json"]))
-		self.file_op_target = imp
-
-	def add_imports(self, imp : list[FileSlot]) -> None:
-		self.imported.extend(imp)
-		self.selected_import = self.imported[-1]
-		self.changed_selected = True
-
-	def create_import(self, path : str = "unsaved.json") -> FileSlot:
-		self.imported.append(FileSlot(path=path, format_id="bankviz-import", content=Import()))
-		self.selected_import = self.imported[-1]
-		self.changed_selected = True
-		return self.selected_import
-
-	def add_sources(self, sources : list[str]) -> None:
-		self.selected_import.content.files.extend(sources)
-		self.changed_selected = True
-
-	def try_select_sources(self) -> bool:
-		if self.selected_import:
-			self.file_dialog = (UI.FileOperation.SECLECT_SOURCES, pfd.open_file("Select source files", filters=["*.csv"], options=pfd.opt.multiselect))
-		else:
-			log("default", "imports", "No import selected", Log.Level.WARN)
-
-	def save_button(self, imp : FileSlot) -> bool:
-		pressed = False
-		if not imp or not imp.content.valid():
-			imgui.begin_disabled()
-		if imgui.button("Save"):
-			pressed = True
-			self.save_import(imp)
-		if not imp or not imp.content.valid():
-			imgui.end_disabled()
-		return pressed
-
-	def reload_button(self, imp : FileSlot) -> bool:
-		pressed = False
-		if not imp or not imp.content.valid():
-			imgui.begin_disabled()
-		if imgui.button("Reload"):
-			pressed = True
-			imp.load()
-		if not imp or not imp.content.valid():
-			imgui.end_disabled()
-		return pressed
-
-	def load_button(self) -> bool:
-		pressed = False
-		if imgui.button("Load"):
-			self.load_imports()
-		return pressed
-
-	def remove_import(self, imp : FileSlot) -> bool:
-		if self.selected_import == imp:
-			self.selected_import = None
-			self.changed_selected = True
-		self.imported.remove(imp)
-
-	def remove_button(self, imp : FileSlot) -> bool:
-		pressed = False
-		if not imp:
-			imgui.begin_disabled()
-		if imgui.button("X"):
-			pressed = True
-			self.remove_import(imp)
-		if not imp:
-			imgui.end_disabled()
-		return pressed
-
-	def file_op_ready(self, operation) -> bool:
-		return self.file_dialog[0] == operation and self.file_dialog[1].ready()
-
-	def get_selection(self) -> Import | None:
-		return self.selected_import.content if self.selected_import else None
-
-	def select_import_dates(self) -> bool:
-		diff = self.get_selection().select_dates_from_contents()
-		if diff:
-			self.get_selection().load_entries()
-		self.selected_import.dirty |= diff
-		self.changed_selected |= diff
-		return diff
-
-	def menu(self, title : str):
-		self.changed_selected = False
-		with imgui_ctx.begin_menu(title, True) as menu:
-			if menu:
-				if imgui.menu_item("New", None, None)[0]:
-					self.imported.append(FileSlot(path="unsaved.json", format_id="bankviz-import", content=Import()))
-					self.selected_import = self.imported[-1]
-					self.changed_selected = True
-				if imgui.menu_item("Load", None, None)[0]:
-					self.load_imports()
-				if imgui.menu_item("Reload", None, None)[0]:
-					for imp in self.imported:
-						imp.load()
-				if not self.selected_import:
-					imgui.begin_disabled()
-				if imgui.menu_item("Save", None, None)[0]:
-					self.save_import(self.selected_import)
-				if not self.selected_import:
-					imgui.end_disabled()
-
-	def draw(self, title : str = "Imports") -> tuple[bool, Import]:
-		with imgui_ctx.begin(title) as window:
-			if window:
-				if imgui.is_window_focused() and self.selected_import and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.s) and self.selected_import.dirty:
-					self.save_import(self.selected_import)
-
-				with imgui_ctx.begin_table("##imports table", 3, flags=imgui.TableFlags_.resizable):
-					#region imports list column
-					imgui.table_next_column()
-					if imgui.button("New"):
-						self.imported.append(FileSlot(path="unsaved.json", format_id="bankviz-import", content=Import()))
-						self.selected_import = self.imported[-1]
-						self.changed_selected = True
-					imgui.same_line()
-					self.save_button(self.selected_import)
-					if self.file_op_ready(UI.FileOperation.SAVE_IMPORTS):
-						filepath = self.file_dialog[1].result()
-						if filepath:
-							self.selected_import.save(path_override=filepath)
-							self.changed_selected = True
-						self.file_dialog = UI.FileOperation.make_noop()
-						self.file_op_target = None
-					imgui.same_line()
-					self.load_button()
-					if self.file_op_ready(UI.FileOperation.LOAD_IMPORTS):
-						for filepath in self.file_dialog[1].result():
-							new_import = FileSlot.from_file(filepath, format_id="bankviz-import")
-							if new_import:
-								self.imported.append(new_import)
-						self.selected_import = self.imported[-1] if len(self.imported) > 0 else None
-						self.changed_selected = True
-						self.file_dialog = UI.FileOperation.make_noop()
-					imgui.same_line()
-					self.reload_button(self.selected_import)
-					imgui.same_line()
-					self.remove_button(self.selected_import)
-
-					with imgui_ctx.begin_list_box("##imports", imgui.get_content_region_avail()):
-						with imgui_ctx.begin_table('##import entry', 2, flags=imgui.TableFlags_.resizable):
-
-							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.l):
-								self.load_imports()
-							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.n):
-								self.create_import()
-							if imgui.is_window_focused() and self.selected_import and imgui.is_key_pressed(imgui.Key.delete):
-								self.remove_import(self.selected_import)
-							if imgui.is_window_focused() and imgui.is_key_pressed(imgui.Key.escape):
-								self.selected_import = None
-
-							index_selected = self.imported.index(self.selected_import) if self.selected_import else -1
-							index_selected, changed = list_navigate(index_selected, len(self.imported))
-							if changed:
-								self.selected_import = self.imported[index_selected]
-								self.changed_selected = True
-
-							for import_data, idx in zip(self.imported, range(len(self.imported))):
-								with imgui_ctx.push_id(idx):
-									imgui.table_next_row()
-									imgui.table_next_column()
-									just, selected = imgui.selectable(path.basename(import_data.path) + (" ·" if import_data.dirty else ''), self.selected_import == import_data if self.selected_import else False, flags=imgui.SelectableFlags_.allow_double_click)
-									if selected:
-										self.selected_import = import_data
-										if just:
-											self.changed_selected = True
-									imgui.table_next_column()
-									self.save_button(import_data)
-									imgui.same_line()
-									self.reload_button(import_data)
-									imgui.same_line()
-									self.remove_button(import_data)
-						if imgui.button("+"):
-							self.create_import()
-						imgui.same_line()
-						if imgui.button("Load"):
-							self.file_dialog = (UI.FileOperation.LOAD_IMPORTS, pfd.open_file("Select report file", filters=["*.json"], options=pfd.opt.multiselect))
-					#endregion imports list column
-
-					#region import config column
-					imgui.table_next_column()
-					if (self.selected_import):
-						if len(self.get_selection().files) == 0:
-							imgui.begin_disabled()
-						if imgui.button("Select dates from contents"):
-							self.select_import_dates()
-						if len(self.get_selection().files) == 0:
-							imgui.end_disabled()
-						imgui.same_line()
-						_, self.auto_select_import_dates = imgui.checkbox("Auto", self.auto_select_import_dates)
-						if self.auto_select_import_dates:
-							imgui.begin_disabled()
-						changed, self.get_selection().begin = input_date("Begin", self.get_selection().begin)
-						changed, self.get_selection().end = input_date("End", self.get_selection().end)
-						if changed and self.get_selection().valid():
-							self.get_selection().load_entries()
-							self.changed_selected = True
-						if self.auto_select_import_dates:
-							imgui.end_disabled()
-
-					with imgui_ctx.begin_list_box("##imports files box", imgui.get_content_region_avail()):
-						if self.selected_import:
-							with imgui_ctx.begin_table("##import files entry table", 2, flags=imgui.TableFlags_.resizable):
-								if imgui.is_window_focused() and self.selected_source_file and imgui.is_key_pressed(imgui.Key.delete):
-									self.remove_source(self.selected_source_file)
-								if imgui.is_window_focused() and (imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.l) or imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.n)):
-									self.try_select_sources()
-								if imgui.is_window_focused() and imgui.is_key_pressed(imgui.Key.escape):
-									self.selected_source_file = None
-
-								index_selected = self.get_selection().files.index(self.selected_source_file) if self.selected_source_file else -1
-								index_selected, changed = list_navigate(index_selected, len(self.get_selection().files))
-								if changed:
-									self.selected_source_file = self.get_selection().files[index_selected]
-								for file in self.get_selection().files:
-									with imgui_ctx.push_id(file):
-										imgui.table_next_row()
-										imgui.table_next_column()
-										_, selected = imgui.selectable(path.basename(file), self.selected_source_file == file, imgui.SelectableFlags_.allow_double_click)
-										if selected:
-											self.selected_source_file = file
-										imgui.table_next_column()
-										if imgui.button("X"):
-											self.remove_source(file)
-							if (imgui.button("+")):
-								self.try_select_sources()
-							if self.file_op_ready(UI.FileOperation.SECLECT_SOURCES):
-								for filepath in self.file_dialog[1].result():
-									self.get_selection().files.append(filepath)
-									self.selected_import.dirty = True
-								self.get_selection().load_entries()
-								self.changed_selected = True
-								self.file_dialog = UI.FileOperation.make_noop()
-					#endregion import config column
-
-					#region import contents column
-					imgui.table_next_column()
-					with imgui_ctx.begin_list_box("##imports contents box", imgui.get_content_region_avail()):
-						if self.selected_import and self.get_selection().entries:
-							columns = self.get_selection().entries[0].keys()
-							with imgui_ctx.begin_table("##import contents table", len(columns), flags=imgui.TableFlags_.resizable):
-								for c in columns:
-									imgui.table_setup_column(c)
-								imgui.table_headers_row()
-								for entry in self.get_selection().entries:
-									imgui.table_next_row()
-									for c in columns:
-										imgui.table_next_column()
-										imgui.text(entry[c])
-					#endregion import contents column
-		if self.auto_select_import_dates and self.changed_selected:
-			self.select_import_dates()
-		return self.changed_selected, self.get_selection()
-
-	def remove_source(self, file : str):
-		self.get_selection().files.remove(file)
-		self.get_selection().load_entries()
-		self.selected_import.dirty = True
-		self.changed_selected = True
-		if file == self.selected_source_file:
-			self.selected_source_file = None
-
-# endregion ui
@@ -0,0 +1,396 @@
+import calendar
+from datetime import datetime
+from enum import Enum
+from os import path
+from app import list_navigate
+from imgui_bundle import portable_file_dialogs as pfd #type: ignore
+from imgui_bundle import imgui, imgui_ctx, ImVec2
+from console import log, LogEntry as Log
+from vjf import FileSlot
+from schedule import Timespan
+from table import Transactions
+from imports import Import, read_import
+from worker import Job, Worker
+
+def input_date(label : str, date : datetime) -> tuple[bool, datetime]:
+	changed = False
+	changed, num_dates = imgui.input_int3(label, [date.day if date else 1, date.month if date else 1, date.year if date else 1])
+	d, m, y = num_dates
+	m = max(1, min(12, m))
+	d = max(1, min(calendar.monthrange(y, m)[1], d))
+	if (changed and date):
+		date = date.replace(day=d, month=m, year=y)
+	elif changed:
+		date = datetime(year=y, month=m, day=d)
+	return changed, date
+
+#* materialises lazy slots off the UI thread, the UI only sees the slots that parsed once the job returns them
+def open_slots(job : Job, slots : list[FileSlot]) -> list[FileSlot]:
+	opened = []
+	for done, slot in enumerate(slots):
+		job.report(done / len(slots))
+		if slot.content is not None:
+			opened.append(slot)
+	job.report(1.0)
+	return opened
+
+class UI:
+
+	class FileOperation(Enum):
+		NOOP = 0
+		LOAD_IMPORTS = 1
+		SAVE_IMPORTS = 2
+		SECLECT_SOURCES = 3
+
+		def make_noop():
+			return (UI.FileOperation.NOOP, None)
+
+	def __init__(self):
+		self.file_dialog : tuple[UI.FileOperation, pfd.open_file | pfd.save_file] = UI.FileOperation.make_noop()
+		self.file_op_target : FileSlot = None
+		self.imported : list[FileSlot] = []
+		self.selected_import : FileSlot = None
+		self.selected_source_file : str = None
+		self.auto_select_import_dates : bool = True
+		self.changed_selected : bool = False
+		self.loader : Worker = Worker("imports")
+		self.loading : tuple[Job, FileSlot, bool] = None
+		self.loaded : bool = False
+		self.formatted_rows : dict[FileSlot, tuple[Transactions, list[tuple[str, ...] | None]]] = {}
+		self.opener : Worker = Worker("open imports", supersede=False)
+		self.opening : list[Job] = [] #* in submission order, the opener runs them one after the other
+
+	def load_imports(self) -> bool:
+		self.file_dialog = (UI.FileOperation.LOAD_IMPORTS, pfd.open_file("Select report file", filters=["*.json"], options=pfd.opt.multiselect))
+
+	def save_import(self, imp : FileSlot) -> bool:
+		self.file_dialog = (UI.FileOperation.SAVE_IMPORTS, pfd.save_file("Save as", imp.path, filters=["*.json"]))
+		self.file_op_target = imp
+
+	#* lazy slots are parsed in the background and listed by poll_opening() once ready
+	def add_imports(self, imp : list[FileSlot]) -> None:
+		pending = [slot for slot in imp if not slot.ready()]
+		if len(pending) > 0:
+			self.opening.append(self.opener.submit("open imports", open_slots, pending))
+		ready = [slot for slot in imp if slot.ready()]
+		if len(ready) > 0:
+			self.imported.extend(ready)
+			self.selected_import = self.imported[-1]
+			self.changed_selected = True
+
+	def poll_opening(self) -> None:
+		opened = []
+		while len(self.opening) > 0 and self.opening[0].done():
+			job = self.opening.pop(0)
+			if job.succeeded():
+				opened.extend(job.result())
+			elif not job.cancelled.is_set():
+				log("default", "imports", f"failed to open imports : {job.future.exception()}", Log.Level.ERR)
+		if len(opened) > 0:
+			self.imported.extend(opened)
+			self.selected_import = self.imported[-1]
+			self.changed_selected = True
+
+	def create_import(self, path : str = "unsaved.json") -> FileSlot:
+		self.imported.append(FileSlot(path=path, format_id="bankviz-import", content=Import()))
+		self.selected_import = self.imported[-1]
+		self.changed_selected = True
+		return self.selected_import
+
+	def add_sources(self, sources : list[str]) -> None:
+		self.selected_import.content.files.extend(sources)
+		self.changed_selected = True
+
+	def try_select_sources(self) -> bool:
+		if self.selected_import:
+			self.file_dialog = (UI.FileOperation.SECLECT_SOURCES, pfd.open_file("Select source files", filters=["*.csv"], options=pfd.opt.multiselect))
+		else:
+			log("default", "imports", "No import selected", Log.Level.WARN)
+
+	def save_button(self, imp : FileSlot) -> bool:
+		pressed = False
+		if not imp or not imp.content.valid():
+			imgui.begin_disabled()
+		if imgui.button("Save"):
+			pressed = True
+			self.save_import(imp)
+		if not imp or not imp.content.valid():
+			imgui.end_disabled()
+		return pressed
+
+	def reload_button(self, imp : FileSlot) -> bool:
+		pressed = False
+		if not imp or not imp.content.valid():
+			imgui.begin_disabled()
+		if imgui.button("Reload"):
+			pressed = True
+			self.reload_import(imp)
+		if not imp or not imp.content.valid():
+			imgui.end_disabled()
+		return pressed
+
+	def load_button(self) -> bool:
+		pressed = False
+		if imgui.button("Load"):
+			self.load_imports()
+		return pressed
+
+	def remove_import(self, imp : FileSlot) -> bool:
+		if self.selected_import == imp:
+			self.selected_import = None
+			self.changed_selected = True
+		self.imported.remove(imp)
+		self.formatted_rows.pop(imp, None)
+
+	def remove_button(self, imp : FileSlot) -> bool:
+		pressed = False
+		if not imp:
+			imgui.begin_disabled()
+		if imgui.button("X"):
+			pressed = True
+			self.remove_import(imp)
+		if not imp:
+			imgui.end_disabled()
+		return pressed
+
+	def file_op_ready(self, operation) -> bool:
+		return self.file_dialog[0] == operation and self.file_dialog[1].ready()
+
+	def get_selection(self) -> Import | None:
+		return self.selected_import.content if self.selected_import else None
+
+	#* Loads the entries of an import in the background, the result is applied by poll_load() when ready
+	def request_load(self, slot : FileSlot, select_dates : bool = False) -> Job:
+		imp : Import = slot.content
+		flt = Timespan(imp.begin, imp.end) if imp.valid() and not select_dates else None
+		job = self.loader.submit("load entries", read_import, list(imp.files), flt)
+		self.loading = (job, slot, select_dates)
+		return job
+
+	def poll_load(self) -> bool:
+		job = self.loader.poll()
+		if job is None or self.loading is None or job is not self.loading[0]:
+			return False
+		_, slot, select_dates = self.loading
+		self.loading = None
+		if not job.succeeded():
+			if not job.cancelled.is_set():
+				log("default", "imports", f"failed to load entries of {slot.path} : {job.future.exception()}", Log.Level.ERR)
+			return False
+		begin, end, entries = job.result()
+		imp : Import = slot.content
+		if select_dates and begin is not None:
+			diff = imp.begin != begin or imp.end != end
+			imp.begin, imp.end = begin, end
+			slot.dirty |= diff
+		imp.entries = entries
+		imp.loaded = True
+		self.changed_selected = self.changed_selected or slot == self.selected_import
+		return True
+
+	#* Display strings of an entry, formatted on first display & kept until the import's entries change
+	def formatted_row(self, slot : FileSlot, index : int) -> tuple[str, ...]:
+		entries = slot.content.entries
+		if slot not in self.formatted_rows or self.formatted_rows[slot][0] is not entries:
+			self.formatted_rows[slot] = (entries, [None] * len(entries))
+		rows = self.formatted_rows[slot][1]
+		if rows[index] is None:
+			row = entries.row(index)
+			rows[index] = tuple(row[c] for c in Transactions.fields)
+		return rows[index]
+
+	#* only the import file is read here, the entries of the selected import are loaded in the background
+	def reload_import(self, slot : FileSlot) -> None:
+		if slot.load() is not None:
+			self.formatted_rows.pop(slot, None)
+			self.changed_selected = self.changed_selected or slot == self.selected_import
+
+	def select_import_dates(self) -> None:
+		self.request_load(self.selected_import, select_dates=True)
+
+	def menu(self, title : str):
+		self.changed_selected = False
+		with imgui_ctx.begin_menu(title, True) as menu:
+			if menu:
+				if imgui.menu_item("New", None, None)[0]:
+					self.imported.append(FileSlot(path="unsaved.json", format_id="bankviz-import", content=Import()))
+					self.selected_import = self.imported[-1]
+					self.changed_selected = True
+				if imgui.menu_item("Load", None, None)[0]:
+					self.load_imports()
+				if imgui.menu_item("Reload", None, None)[0]:
+					for imp in self.imported:
+						self.reload_import(imp)
+				if not self.selected_import:
+					imgui.begin_disabled()
+				if imgui.menu_item("Save", None, None)[0]:
+					self.save_import(self.selected_import)
+				if not self.selected_import:
+					imgui.end_disabled()
+
+	def draw(self, title : str = "Imports") -> tuple[bool, Import]:
+		self.loaded = self.poll_load()
+		self.poll_opening()
+		with imgui_ctx.begin(title) as window:
+			if window:
+				if len(self.opening) > 0:
+					imgui.text_colored(imgui.ImVec4(1, 1, 0, 1), f"opening imports... {self.opening[0].progress:.0%}")
+				if imgui.is_window_focused() and self.selected_import and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.s) and self.selected_import.dirty:
+					self.save_import(self.selected_import)
+
+				with imgui_ctx.begin_table("##imports table", 3, flags=imgui.TableFlags_.resizable):
+					#region imports list column
+					imgui.table_next_column()
+					if imgui.button("New"):
+						self.imported.append(FileSlot(path="unsaved.json", format_id="bankviz-import", content=Import()))
+						self.selected_import = self.imported[-1]
+						self.changed_selected = True
+					imgui.same_line()
+					self.save_button(self.selected_import)
+					if self.file_op_ready(UI.FileOperation.SAVE_IMPORTS):
+						filepath = self.file_dialog[1].result()
+						if filepath:
+							self.selected_import.save(path_override=filepath)
+							self.changed_selected = True
+						self.file_dialog = UI.FileOperation.make_noop()
+						self.file_op_target = None
+					imgui.same_line()
+					self.load_button()
+					if self.file_op_ready(UI.FileOperation.LOAD_IMPORTS):
+						opened = [FileSlot.from_file(filepath, format_id="bankviz-import", lazy=True) for filepath in self.file_dialog[1].result()]
+						self.add_imports([slot for slot in opened if slot])
+						self.file_dialog = UI.FileOperation.make_noop()
+					imgui.same_line()
+					self.reload_button(self.selected_import)
+					imgui.same_line()
+					self.remove_button(self.selected_import)
+
+					with imgui_ctx.begin_list_box("##imports", imgui.get_content_region_avail()):
+						with imgui_ctx.begin_table('##import entry', 2, flags=imgui.TableFlags_.resizable):
+
+							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.l):
+								self.load_imports()
+							if imgui.is_window_focused() and imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.n):
+								self.create_import()
+							if imgui.is_window_focused() and self.selected_import and imgui.is_key_pressed(imgui.Key.delete):
+								self.remove_import(self.selected_import)
+							if imgui.is_window_focused() and imgui.is_key_pressed(imgui.Key.escape):
+								self.selected_import = None
+
+							index_selected = self.imported.index(self.selected_import) if self.selected_import else -1
+							index_selected, changed = list_navigate(index_selected, len(self.imported))
+							if changed:
+								self.selected_import = self.imported[index_selected]
+								self.changed_selected = True
+
+							for import_data, idx in zip(self.imported, range(len(self.imported))):
+								with imgui_ctx.push_id(idx):
+									imgui.table_next_row()
+									imgui.table_next_column()
+									just, selected = imgui.selectable(path.basename(import_data.path) + (" ·" if import_data.dirty else ''), self.selected_import == import_data if self.selected_import else False, flags=imgui.SelectableFlags_.allow_double_click)
+									if selected:
+										self.selected_import = import_data
+										if just:
+											self.changed_selected = True
+									imgui.table_next_column()
+									self.save_button(import_data)
+									imgui.same_line()
+									self.reload_button(import_data)
+									imgui.same_line()
+									self.remove_button(import_data)
+						if imgui.button("+"):
+							self.create_import()
+						imgui.same_line()
+						if imgui.button("Load"):
+							self.file_dialog = (UI.FileOperation.LOAD_IMPORTS, pfd.open_file("Select report file", filters=["*.json"], options=pfd.opt.multiselect))
+					#endregion imports list column
+
+					#region import config column
+					imgui.table_next_column()
+					if (self.selected_import):
+						if len(self.get_selection().files) == 0:
+							imgui.begin_disabled()
+						if imgui.button("Select dates from contents"):
+							self.select_import_dates()
+						if len(self.get_selection().files) == 0:
+							imgui.end_disabled()
+						imgui.same_line()
+						_, self.auto_select_import_dates = imgui.checkbox("Auto", self.auto_select_import_dates)
+						if self.auto_select_import_dates:
+							imgui.begin_disabled()
+						changed, self.get_selection().begin = input_date("Begin", self.get_selection().begin)
+						changed, self.get_selection().end = input_date("End", self.get_selection().end)
+						if changed and self.get_selection().valid():
+							self.request_load(self.selected_import)
+						if self.auto_select_import_dates:
+							imgui.end_disabled()
+
+					with imgui_ctx.begin_list_box("##imports files box", imgui.get_content_region_avail()):
+						if self.selected_import:
+							with imgui_ctx.begin_table("##import files entry table", 2, flags=imgui.TableFlags_.resizable):
+								if imgui.is_window_focused() and self.selected_source_file and imgui.is_key_pressed(imgui.Key.delete):
+									self.remove_source(self.selected_source_file)
+								if imgui.is_window_focused() and (imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.l) or imgui.is_key_chord_pressed(imgui.Key.left_ctrl | imgui.Key.n)):
+									self.try_select_sources()
+								if imgui.is_window_focused() and imgui.is_key_pressed(imgui.Key.escape):
+									self.selected_source_file = None
+
+								index_selected = self.get_selection().files.index(self.selected_source_file) if self.selected_source_file else -1
+								index_selected, changed = list_navigate(index_selected, len(self.get_selection().files))
+								if changed:
+									self.selected_source_file = self.get_selection().files[index_selected]
+								for file in self.get_selection().files:
+									with imgui_ctx.push_id(file):
+										imgui.table_next_row()
+										imgui.table_next_column()
+										_, selected = imgui.selectable(path.basename(file), self.selected_source_file == file, imgui.SelectableFlags_.allow_double_click)
+										if selected:
+											self.selected_source_file = file
+										imgui.table_next_column()
+										if imgui.button("X"):
+											self.remove_source(file)
+							if (imgui.button("+")):
+								self.try_select_sources()
+							if self.file_op_ready(UI.FileOperation.SECLECT_SOURCES):
+								for filepath in self.file_dialog[1].result():
+									self.get_selection().files.append(filepath)
+									self.selected_import.dirty = True
+								self.request_load(self.selected_import, select_dates=self.auto_select_import_dates)
+								self.file_dialog = UI.FileOperation.make_noop()
+					#endregion import config column
+
+					#region import contents column
+					imgui.table_next_column()
+					if self.loader.busy():
+						imgui.progress_bar(self.loader.job.progress, ImVec2(-1, 0), "Loading...")
+					with imgui_ctx.begin_list_box("##imports contents box", imgui.get_content_region_avail()):
+						if self.selected_import and self.get_selection().entries:
+							columns = Transactions.fields
+							with imgui_ctx.begin_table("##import contents table", len(columns), flags=imgui.TableFlags_.resizable):
+								for c in columns:
+									imgui.table_setup_column(c)
+								imgui.table_headers_row()
+								#* only submit the visible rows
+								clipper = imgui.ListClipper()
+								clipper.begin(len(self.get_selection().entries))
+								while clipper.step():
+									for index in range(clipper.display_start, clipper.display_end):
+										imgui.table_next_row()
+										for text in self.formatted_row(self.selected_import, index):
+											imgui.table_next_column()
+											imgui.text_unformatted(text)
+					#endregion import contents column
+		#* entries that just finished loading already had their dates selected
+		if self.changed_selected and self.selected_import and not self.loaded:
+			if self.auto_select_import_dates:
+				self.select_import_dates()
+			elif not self.selected_import.content.loaded:
+				self.request_load(self.selected_import)
+		return self.changed_selected, self.get_selection()
+
+	def remove_source(self, file : str):
+		self.get_selection().files.remove(file)
+		self.request_load(self.selected_import, select_dates=self.auto_select_import_dates)
+		self.selected_import.dirty = True
+		if file == self.selected_source_file:
+			self.selected_source_file = None
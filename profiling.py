@@ -0,0 +1,130 @@
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+import os
+from os import path
+import sys
+import threading
+import time
+import numpy as np
+
+#* Rolling durations of one pipeline stage, fixed size so recording never allocates
+class Stage:
+
+	def __init__(self, name : str, size : int = 240):
+		self.name : str = name
+		self.samples : np.ndarray = np.zeros(size, dtype=np.float32) #* milliseconds
+		self.next : int = 0 #* ring index of the next sample, also the offset of the oldest one once full
+		self.count : int = 0
+		self.last : float = 0.0
+		self.lock : threading.Lock = threading.Lock() #* stages are recorded from several threads at once
+
+	def add(self, seconds : float) -> None:
+		with self.lock:
+			self.last = seconds * 1000
+			self.samples[self.next] = self.last
+			self.next = (self.next + 1) % len(self.samples)
+			self.count += 1
+
+	#* copy of the held samples, oldest first, taken under the lock so a concurrent add() is never half seen
+	def window(self) -> np.ndarray:
+		with self.lock:
+			if self.count >= len(self.samples):
+				return np.concatenate((self.samples[self.next:], self.samples[:self.next]))
+			return self.samples[:self.next].copy()
+
+	def mean(self) -> float:
+		window = self.window()
+		return float(window.mean()) if len(window) > 0 else 0.0
+
+	def peak(self) -> float:
+		window = self.window()
+		return float(window.max()) if len(window) > 0 else 0.0
+
+stages : dict[str, Stage] = {}
+stages_lock : threading.Lock = threading.Lock()
+
+#* stages are recorded from the UI thread & the background workers
+def record(name : str, seconds : float) -> None:
+	if name not in stages:
+		with stages_lock:
+			stages.setdefault(name, Stage(name))
+	stages[name].add(seconds)
+
+@contextmanager
+def timer(name : str):
+	begin = time.perf_counter()
+	try:
+		yield
+	finally:
+		record(name, time.perf_counter() - begin)
+
+def timed(name : str):
+	def decorator(func):
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			with timer(name):
+				return func(*args, **kwargs)
+		return wrapper
+	return decorator
+
+profile_dir : str = os.environ.get("BVIZ_PROFILE_DIR", "profiles")
+
+def capture_filename(extension : str) -> str:
+	os.makedirs(profile_dir, exist_ok=True)
+	return path.join(profile_dir, f"bviz-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}{extension}")
+
+#* Deterministic cProfile capture, only sees the thread that started it (the UI thread), saved as a pstats file
+class ProfileCapture:
+
+	extension : str = ".prof"
+
+	def __init__(self):
+		import cProfile
+		self.profile = cProfile.Profile()
+		self.profile.enable()
+
+	def stop(self) -> str:
+		self.profile.disable()
+		filename = capture_filename(ProfileCapture.extension)
+		self.profile.dump_stats(filename)
+		return filename
+
+#* Statistical capture of every thread (background loads & analyses included)
+#* saved as folded stacks, readable by flamegraph.pl or speedscope
+class SamplingCapture:
+
+	extension : str = ".folded"
+
+	def __init__(self, interval : float = 0.001):
+		self.interval : float = interval
+		self.stacks : Counter = Counter()
+		self.stopped : threading.Event = threading.Event()
+		self.thread : threading.Thread = threading.Thread(target=self.sample, name="profiling", daemon=True)
+		self.thread.start()
+
+	def sample(self) -> None:
+		names = {}
+		while not self.stopped.wait(self.interval):
+			for ident, frame in sys._current_frames().items():
+				if ident == self.thread.ident:
+					continue
+				stack = []
+				while frame is not None:
+					code = frame.f_code
+					stack.append(f"{code.co_name} ({path.basename(code.co_filename)}:{code.co_firstlineno})")
+					frame = frame.f_back
+				if ident not in names:
+					names = { t.ident : t.name for t in threading.enumerate() }
+				stack.append(names.get(ident, str(ident)))
+				self.stacks[";".join(reversed(stack))] += 1
+
+	def stop(self) -> str:
+		self.stopped.set()
+		self.thread.join()
+		filename = capture_filename(SamplingCapture.extension)
+		with open(filename, "w") as out:
+			for stack, count in self.stacks.most_common():
+				out.write(f"{stack} {count}\n")
+		return filename
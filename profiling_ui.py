@@ -0,0 +1,59 @@
+from imgui_bundle import imgui, imgui_ctx, ImVec2
+from console import log, LogEntry as Log
+from profiling import stages, ProfileCapture, SamplingCapture
+
+class UI:
+
+	def __init__(self):
+		self.capture : ProfileCapture | SamplingCapture = None
+
+	def start_capture(self, kind : type) -> None:
+		self.capture = kind()
+		log("default", "profiling", f"started {kind.__name__}", Log.Level.DEBUG)
+
+	def stop_capture(self) -> None:
+		try:
+			filename = self.capture.stop()
+			log("default", "profiling", f"profile saved to {filename}", Log.Level.INFO)
+		except Exception as e:
+			log("default", "profiling", f"failed to save profile : {e}", Log.Level.ERR)
+		self.capture = None
+
+	def menu(self, title : str) -> None:
+		with imgui_ctx.begin_menu(title, True) as menu:
+			if menu:
+				capturing = self.capture is not None
+				if capturing:
+					imgui.begin_disabled()
+				if imgui.menu_item("Start cProfile capture (UI thread)", None, None)[0]:
+					self.start_capture(ProfileCapture)
+				if imgui.menu_item("Start sampling capture (all threads)", None, None)[0]:
+					self.start_capture(SamplingCapture)
+				if capturing:
+					imgui.end_disabled()
+				else:
+					imgui.begin_disabled()
+				if imgui.menu_item("Stop & save capture", None, None)[0]:
+					self.stop_capture()
+				if not capturing:
+					imgui.end_disabled()
+
+	def draw(self, title : str = "Performance") -> None:
+		with imgui_ctx.begin(title) as window:
+			if window:
+				if self.capture is not None:
+					imgui.text_colored(imgui.ImVec4(1, 1, 0, 1), f"capturing ({type(self.capture).__name__})")
+				with imgui_ctx.begin_table("##stages", 2, flags=imgui.TableFlags_.resizable | imgui.TableFlags_.borders_inner_h):
+					imgui.table_setup_column("stage", imgui.TableColumnFlags_.width_fixed)
+					imgui.table_setup_column("durations (ms)", imgui.TableColumnFlags_.width_stretch)
+					imgui.table_headers_row()
+					for stage in list(stages.values()):
+						imgui.table_next_row()
+						imgui.table_next_column()
+						imgui.text_unformatted(stage.name)
+						imgui.text_unformatted(f"last {stage.last:.2f}ms")
+						imgui.text_unformatted(f"mean {stage.mean():.2f}ms")
+						imgui.text_unformatted(f"peak {stage.peak():.2f}ms")
+						imgui.text_unformatted(f"count {stage.count}")
+						imgui.table_next_column()
+						imgui.plot_histogram(f"##{stage.name}", stage.window(), scale_min=0.0, graph_size=ImVec2(-1, imgui.get_text_line_height_with_spacing() * 4))
@@ -1,8 +1,6 @@
-import calendar
 from datetime import datetime
 from enum import Enum
-from dateutil.relativedelta import relativedelta
-from imgui_bundle import imgui, imgui_ctx, implot
+import numpy as np
 
 class Granularity(Enum):
 	Day = 0
@@ -12,23 +10,57 @@ class Granularity(Enum):
 	def __str__(self) -> str:
 		return ['day', 'month', 'year'][int(self)]
 
+#* Character offsets of the fields of a fixed width date format (only %d, %m, %Y & single char separators), None if not fixed width
+def fixed_date_layout(fmt : str) -> tuple[int, dict[str, int]] | None:
+	widths = { "d" : 2, "m" : 2, "Y" : 4 }
+	offsets = dict()
+	i, width = 0, 0
+	while i < len(fmt):
+		if fmt[i] == '%':
+			if i + 1 >= len(fmt) or fmt[i + 1] not in widths:
+				return None
+			offsets[fmt[i + 1]] = width
+			width += widths[fmt[i + 1]]
+			i += 2
+		else:
+			width += 1
+			i += 1
+	return (width, offsets) if len(offsets) == 3 else None
+
+#* Parse a column of date strings to datetime64[D], each distinct string is only parsed once
+def parse_dates(strings, fmt : str = "%d/%m/%Y") -> np.ndarray:
+	strings = np.asarray(strings, dtype=str)
+	if len(strings) == 0:
+		return np.array([], dtype="datetime64[D]")
+	values, inverse = np.unique(strings, return_inverse=True)
+	layout = fixed_date_layout(fmt)
+	parsed = None
+	if layout is not None and values.dtype.itemsize == layout[0] * 4 and np.all(np.char.str_len(values) == layout[0]):
+		#* rearrange the characters into ISO "YYYY-MM-DD" and let numpy do the conversion
+		width, offsets = layout
+		chars = values.view("U1").reshape(-1, width)
+		iso = np.full((len(values), 10), "-", dtype="U1")
+		iso[:, 0:4] = chars[:, offsets["Y"]:offsets["Y"] + 4]
+		iso[:, 5:7] = chars[:, offsets["m"]:offsets["m"] + 2]
+		iso[:, 8:10] = chars[:, offsets["d"]:offsets["d"] + 2]
+		try:
+			parsed = iso.view("U10").ravel().astype("datetime64[D]")
+		except ValueError:
+			parsed = None
+	if parsed is None:
+		parsed = np.array([datetime.strptime(str(v), fmt) for v in values], dtype="datetime64[D]")
+	return parsed[inverse.ravel()]
+
 class Timespan:
 
 	@staticmethod
 	def from_dates(dates, fmt : str = "%d/%m/%Y"):
-		parsed = [datetime.strptime(d, fmt) for d in dates]
-		return Timespan(min(parsed), max(parsed))
+		parsed = parse_dates(dates, fmt)
+		return Timespan(datetime.combine(parsed.min().item(), datetime.min.time()), datetime.combine(parsed.max().item(), datetime.min.time()))
 
 	@staticmethod
 	def from_date_granularity(date : datetime, granularity : Granularity, gran_count : int = 1):
-		match granularity:
-			case Granularity.Day:
-				return Timespan(b=date, e=date + relativedelta(days=gran_count-1))
-			case Granularity.Month:
-				e = date + relativedelta(months=gran_count-1)
-				return Timespan(b=date.replace(day=1), e=e.replace(day=calendar.monthrange(e.year, e.month)[1]))
-			case Granularity.Year:
-				return Timespan(b=date.replace(month=1, day=1), e=(date + relativedelta(years=gran_count-1)).replace(month=12, day=31))
+		return Timespan(date, date).sectionned(granularity, gran_count)[0]
 
 	def __init__(self, b : datetime, e : datetime):
 		self.begin : datetime = b
@@ -49,31 +81,41 @@ class Timespan:
 	def __str__(self) -> str:
 		return self.span_str()
 
-	def sectionned(self, granularity : Granularity, count : int = 1) -> list:
-		it = Timespan(Timespan.from_date_granularity(self.begin, granularity, count).begin, Timespan.from_date_granularity(self.end, granularity, count).end)
-		sections = []
-		while it.begin < it.end:
-			match granularity:
-				case Granularity.Day:
-					sections.append(Timespan(b=it.begin, e=it.begin + relativedelta(days=count-1)))
-					it.begin = it.begin + relativedelta(days=count)
-				case Granularity.Month:
-					e = it.begin + relativedelta(months=count-1)
-					sections.append(Timespan(b=it.begin.replace(day=1), e=e.replace(day=calendar.monthrange(e.year, e.month)[1])))
-					it.begin = (it.begin + relativedelta(months=count)).replace(day=1)
-				case Granularity.Year:
-					sections.append(Timespan(b=it.begin.replace(month=1, day=1), e=(it.begin + relativedelta(years=count-1)).replace(month=12, day=31)))
-					it.begin = (it.begin + relativedelta(years=count)).replace(month=1, day=1)
-		return sections
-
-def input_date(label : str, date : datetime) -> tuple[bool, datetime]:
-	changed = False
-	changed, num_dates = imgui.input_int3(label, [date.day if date else 1, date.month if date else 1, date.year if date else 1])
-	d, m, y = num_dates
-	m = max(1, min(12, m))
-	d = max(1, min(calendar.monthrange(y, m)[1], d))
-	if (changed and date):
-		date = date.replace(day=d, month=m, year=y)
-	elif changed:
-		date = datetime(year=y, month=m, day=d)
-	return changed, date
+	def sectionned(self, granularity : Granularity, count : int = 1):
+		return Sections(*section_dates(np.datetime64(self.begin, 'D'), np.datetime64(self.end, 'D'), granularity, count))
+
+granularity_units : dict[Granularity, str] = {
+	Granularity.Day : "D",
+	Granularity.Month : "M",
+	Granularity.Year : "Y",
+}
+
+#* Begin & inclusive end day of every section covering [begin, end], as datetime64[D] arrays
+#* sections are aligned on the first day/month/year of `begin` and stepped by `count` units, the last one may extend past `end`
+def section_dates(begin : np.datetime64, end : np.datetime64, granularity : Granularity, count : int = 1) -> tuple[np.ndarray, np.ndarray]:
+	unit = granularity_units[granularity]
+	first, last = np.datetime64(begin, unit), np.datetime64(end, unit)
+	#* a section starts in every `count` units step up to count - 1 units past the end, like the former iterative stepping did
+	n = max(0, int((last - first).astype(np.int64) + count - 1) // count + 1) if last >= first else 0
+	starts = first + np.arange(n, dtype=np.int64) * count
+	return starts.astype("datetime64[D]"), (starts + count).astype("datetime64[D]") - 1
+
+#* First day of the trailing window of `window` units ending with the unit of each of `ends`
+def window_begins(ends : np.ndarray, granularity : Granularity, window : int = 1) -> np.ndarray:
+	return (ends.astype(f"datetime64[{granularity_units[granularity]}]") - (window - 1)).astype("datetime64[D]")
+
+#* Sections as begin/end day arrays, a Timespan is only built when one is indexed
+class Sections:
+
+	def __init__(self, begins : np.ndarray, ends : np.ndarray):
+		self.begins : np.ndarray = begins
+		self.ends : np.ndarray = ends
+
+	def __len__(self) -> int:
+		return len(self.begins)
+
+	def __getitem__(self, index : int) -> Timespan:
+		return Timespan(datetime.combine(self.begins[index].item(), datetime.min.time()), datetime.combine(self.ends[index].item(), datetime.min.time()))
+
+	def __iter__(self):
+		return (self[i] for i in range(len(self)))
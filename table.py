@@ -0,0 +1,212 @@
+from datetime import datetime
+import json
+import numpy as np
+from schedule import parse_dates
+
+def to_datetime(day : np.datetime64) -> datetime:
+	return datetime.combine(day.item(), datetime.min.time())
+
+#* Amounts are stored as integer cents, exact in sums over any horizon
+def to_amount(cents):
+	return cents / 100
+
+def format_cents(cents : int) -> str:
+	return f"{'-' if cents < 0 else ''}{abs(cents) // 100},{abs(cents) % 100:02}"
+
+#* Parse a column of french formatted amounts ("-12,50") to integer cents, each distinct string is only parsed once
+def parse_amounts(strings) -> np.ndarray:
+	strings = np.asarray(strings, dtype=str)
+	if len(strings) == 0:
+		return np.array([], dtype=np.int64)
+	values, inverse = np.unique(strings, return_inverse=True)
+	cents = np.rint(np.char.replace(values, ',', '.').astype(np.float64) * 100).astype(np.int64)
+	return cents[inverse.ravel()]
+
+#* Sum of `values` over each [bounds[i], bounds[i+1]) range, empty ranges sum to 0
+def segment_sums(values : np.ndarray, bounds : np.ndarray) -> np.ndarray:
+	sums = np.zeros(len(bounds) - 1, dtype=values.dtype)
+	nonempty = bounds[:-1] < bounds[1:]
+	if np.any(nonempty):
+		sums[nonempty] = np.add.reduceat(values, bounds[:-1][nonempty])
+	return sums
+
+#* String column stored as a small vocabulary of unique values + one integer code per row
+class Categorical:
+
+	def __init__(self, values : np.ndarray, codes : np.ndarray):
+		self.values : np.ndarray = values
+		self.codes : np.ndarray = codes
+
+	@staticmethod
+	def from_strings(strings : list[str]):
+		if len(strings) == 0:
+			return Categorical.empty()
+		values, codes = np.unique(np.asarray(strings, dtype=str), return_inverse=True)
+		return Categorical(values, codes.astype(np.int32))
+
+	@staticmethod
+	def empty():
+		return Categorical(np.array([], dtype=str), np.array([], dtype=np.int32))
+
+	@staticmethod
+	def concat(columns : list):
+		if len(columns) == 0:
+			return Categorical.empty()
+		values, inverse = np.unique(np.concatenate([c.values for c in columns]), return_inverse=True)
+		codes = []
+		offset = 0
+		for c in columns:
+			codes.append(inverse[offset:offset + len(c.values)].astype(np.int32)[c.codes])
+			offset += len(c.values)
+		return Categorical(values, np.concatenate(codes))
+
+	def __len__(self) -> int:
+		return len(self.codes)
+
+	def __getitem__(self, key) -> str:
+		if isinstance(key, (int, np.integer)):
+			return str(self.values[self.codes[key]])
+		return Categorical(self.values, self.codes[key])
+
+	def strings(self) -> np.ndarray:
+		return self.values[self.codes]
+
+	#* Evaluate `func` once per unique value and broadcast the result back to the rows
+	def map(self, func, dtype = bool) -> np.ndarray:
+		return np.fromiter((func(v) for v in self.values), dtype=dtype, count=len(self.values))[self.codes]
+
+	def equals(self, value : str) -> np.ndarray:
+		return (self.values == value)[self.codes]
+
+#* byte alignment of every column stored by Transactions.save
+column_alignment : int = 64
+
+class Transactions:
+
+	date_fmt : str = "%d/%m/%Y"
+	text_fields : list[str] = ["type", "account", "label_out", "label_in", "tbd", "note"]
+	fields : list[str] = ["date", "amount"] + text_fields
+
+	#* rows are always kept sorted by date, which lets every consumer slice instead of filter
+	#* `origin` is the position of each row in load order (files in import order, rows in file order), defaults to the given order
+	def __init__(self, date : np.ndarray, amount : np.ndarray, text : dict[str, Categorical], presorted : bool = False, origin : np.ndarray = None):
+		if origin is None:
+			origin = np.arange(len(date), dtype=np.int64)
+		if not presorted and len(date) > 1:
+			order = np.argsort(date, kind="stable")
+			date, amount, text, origin = date[order], amount[order], { k : c[order] for k, c in text.items() }, origin[order]
+		self.date : np.ndarray = date
+		self.amount : np.ndarray = amount
+		self.text : dict[str, Categorical] = text
+		self.origin : np.ndarray = origin
+
+	@staticmethod
+	def empty():
+		return Transactions(np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64), { f : Categorical.empty() for f in Transactions.text_fields }, presorted=True)
+
+	@staticmethod
+	def from_rows(rows : list[dict]):
+		if len(rows) == 0:
+			return Transactions.empty()
+		return Transactions(
+			date=parse_dates([r["date"] for r in rows], Transactions.date_fmt),
+			amount=parse_amounts([r["amount"] for r in rows]),
+			text={ f : Categorical.from_strings([r[f] or "" for r in rows]) for f in Transactions.text_fields },
+		)
+
+	@staticmethod
+	def concat(tables : list):
+		tables = [t for t in tables if len(t) > 0]
+		if len(tables) == 0:
+			return Transactions.empty()
+		if len(tables) == 1:
+			return tables[0]
+		#* each table's origins are shifted past the previous ones, keeping the load order across files
+		offsets = np.cumsum([0] + [int(t.origin.max()) + 1 for t in tables[:-1]])
+		return Transactions(
+			date=np.concatenate([t.date for t in tables]),
+			amount=np.concatenate([t.amount for t in tables]),
+			text={ f : Categorical.concat([t.text[f] for t in tables]) for f in Transactions.text_fields },
+			origin=np.concatenate([t.origin + o for t, o in zip(tables, offsets)]),
+		)
+
+	def __len__(self) -> int:
+		return len(self.date)
+
+	def __getitem__(self, key):
+		if isinstance(key, str):
+			match key:
+				case "date":
+					return self.date
+				case "amount":
+					return self.amount
+				case _:
+					return self.text[key]
+		if isinstance(key, (int, np.integer)):
+			return self.row(key)
+		return Transactions(self.date[key], self.amount[key], { k : c[key] for k, c in self.text.items() }, presorted=isinstance(key, slice) or (isinstance(key, np.ndarray) and key.dtype == bool), origin=self.origin[key])
+
+	def __iter__(self):
+		return (self.row(i) for i in range(len(self)))
+
+	#* row in the original bank statement string form, for per-entry predicates & display
+	def row(self, index : int) -> dict:
+		return {
+			"date" : self.date[index].item().strftime(Transactions.date_fmt),
+			"amount" : format_cents(int(self.amount[index])),
+		} | { f : c[index] for f, c in self.text.items() }
+
+	#* Any field as a categorical column of its statement strings, date & amount are formatted once per unique value
+	def categorical(self, field : str) -> Categorical:
+		match field:
+			case "date":
+				values, codes = np.unique(self.date, return_inverse=True)
+				return Categorical(np.array([d.item().strftime(Transactions.date_fmt) for d in values], dtype=str), codes.astype(np.int32))
+			case "amount":
+				values, codes = np.unique(self.amount, return_inverse=True)
+				return Categorical(np.array([format_cents(int(a)) for a in values], dtype=str), codes.astype(np.int32))
+			case _:
+				return self.text[field]
+
+	def between(self, begin : datetime, end : datetime):
+		return self[np.searchsorted(self.date, np.datetime64(begin, 'D'), side="left"):np.searchsorted(self.date, np.datetime64(end, 'D'), side="right")]
+
+	#* Every column packed in one file: header length, json header { column : (dtype, shape, offset) }, then the aligned column buffers
+	#* one read & no per-column file opens, a cache hit has to beat parsing even small statements
+	def save(self, filename : str, version : str = "") -> None:
+		columns = { "date" : self.date, "amount" : self.amount, "origin" : self.origin } | { f + ".values" : c.values for f, c in self.text.items() } | { f + ".codes" : c.codes for f, c in self.text.items() }
+		columns = { name : np.ascontiguousarray(a) for name, a in columns.items() }
+		layout, offset = {}, 0
+		for name, a in columns.items():
+			layout[name] = (a.dtype.str, a.shape, offset)
+			offset += -(-a.nbytes // column_alignment) * column_alignment
+		header = json.dumps({ "version" : version, "columns" : layout }).encode()
+		header += b" " * (-(8 + len(header)) % column_alignment)
+		with open(filename, "wb") as out:
+			out.write(len(header).to_bytes(8, "little"))
+			out.write(header)
+			for name, a in columns.items():
+				out.write(a.tobytes())
+				out.write(bytes(-a.nbytes % column_alignment))
+
+	#* None when the file was saved with another `version`, columns are read-only views over the file contents
+	@staticmethod
+	def load(filename : str, version : str | None = None):
+		with open(filename, "rb") as inp:
+			data = inp.read()
+		size = int.from_bytes(data[:8], "little")
+		header = json.loads(data[8:8 + size])
+		if version is not None and header["version"] != version:
+			return None
+		base = 8 + size
+		columns = { name : np.frombuffer(data, dtype=np.dtype(dtype), count=int(np.prod(shape)), offset=base + offset).reshape(shape) for name, (dtype, shape, offset) in header["columns"].items() }
+		return Transactions(
+			date=columns["date"],
+			amount=columns["amount"],
+			text={ f : Categorical(columns[f + ".values"], columns[f + ".codes"]) for f in Transactions.text_fields },
+			presorted=True,
+			origin=columns["origin"],
+		)
+
+	def nbytes(self) -> int:
+		return self.date.nbytes + self.amount.nbytes + sum(c.codes.nbytes + c.values.nbytes for c in self.text.values())
@@ -1,6 +1,9 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import total_ordering
 import json
+import os
 from os import path
+import threading
 from typing import Any, Callable
 from console import LogEntry as Log, log
 
@@ -42,18 +45,110 @@ class Format:
 
 FormatMap : dict[str, Format] = {}
 
-def save(filename : str, fmt : Format | str, content : Any):
+#* process umask, read once at import on the main thread, changing it later would briefly affect every thread
+UMASK : int = os.umask(0)
+os.umask(UMASK)
+
+#* plain json document of `content`, detached from the live objects so it can be written from another thread
+def serialise(filename : str, fmt : Format | str, content : Any) -> dict:
+	if isinstance(fmt, str):
+		fmt = FormatMap[fmt]
+	return {
+		'format' : fmt.id,
+		'version' : str(fmt.version),
+		'content' : fmt.serialiser(content, filename)
+	}
+
+#* written into a temporary file next to `filename` then renamed over it, a crash mid-write never leaves a truncated file
+def write_document(filename : str, document : dict) -> bool:
+	import tempfile #* only needed when saving
+	tmp = None
+	try:
+		handle, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=path.dirname(path.abspath(filename)))
+		with os.fdopen(handle, 'w') as out:
+			json.dump(document, out)
+			out.flush()
+			os.fsync(out.fileno())
+		#* mkstemp files are private (0600), keep the mode the file had or would get from open()
+		if path.exists(filename):
+			os.chmod(tmp, os.stat(filename).st_mode & 0o7777)
+		else:
+			os.chmod(tmp, 0o666 & ~UMASK)
+		os.replace(tmp, filename)
+		return True
+	except Exception as e:
+		log("default", "VJF", f"failed to save {filename} : {e}", Log.Level.ERR)
+		if tmp is not None and path.exists(tmp):
+			os.remove(tmp)
+	return False
+
+def save(filename : str, fmt : Format | str, content : Any) -> bool:
 	try:
-		if fmt is str:
-			fmt = FormatMap[fmt]
-		with open(filename, 'w') as out:
-			json.dump({
-				'format' : fmt.id,
-				'version' : str(fmt.version),
-				'content' : fmt.serialiser(content, filename)
-			}, out)
+		document = serialise(filename, fmt, content)
 	except Exception as e:
 		log("default", "VJF", f"failed to save {filename} : {e}", Log.Level.ERR)
+		return False
+	return write_document(filename, document)
+
+#* Write-behind saves on a single background thread
+#* content is serialised by the caller, the thread only writes the resulting documents
+#* saves of a file still waiting for its turn are coalesced, only the latest document gets written
+class Writer:
+
+	def __init__(self):
+		self.lock : threading.Lock = threading.Lock()
+		self.executor : ThreadPoolExecutor = None #* started on the first save, headless runs never need it
+		self.pending : dict[str, tuple[dict, "FileSlot | None"]] = {}
+		self.queued : dict[str, Future] = {}
+
+	def submit(self, filename : str, fmt : Format | str, content : Any, slot : "FileSlot | None" = None) -> Future | None:
+		try:
+			document = serialise(filename, fmt, content)
+		except Exception as e:
+			log("default", "VJF", f"failed to save {filename} : {e}", Log.Level.ERR)
+			if slot is not None:
+				slot.dirty = True
+			return None
+		filename = path.abspath(filename)
+		with self.lock:
+			self.pending[filename] = (document, slot)
+			if filename not in self.queued:
+				if self.executor is None:
+					self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vjf writer")
+				self.queued[filename] = self.executor.submit(self.write, filename)
+			return self.queued[filename]
+
+	def write(self, filename : str) -> bool:
+		with self.lock:
+			document, slot = self.pending.pop(filename)
+			del self.queued[filename]
+		saved = write_document(filename, document)
+		if not saved and slot is not None:
+			slot.dirty = True
+		return saved
+
+	#* blocks until every submitted save is written
+	def flush(self) -> None:
+		if self.executor is not None:
+			self.executor.submit(lambda: None).result() #* single thread, runs after every save queued before it
+
+	def shutdown(self) -> None:
+		self.flush()
+		if self.executor is not None:
+			self.executor.shutdown(wait=True)
+			self.executor = None
+
+writer : Writer = Writer()
+
+def queue_save(filename : str, fmt : Format | str, content : Any) -> Future | None:
+	return writer.submit(filename, fmt, content)
+
+def check_header(fmt : Format, version : VID, expected_fmt : Format | str | None = None) -> None:
+	if expected_fmt is not None:
+		if isinstance(expected_fmt, str):
+			expected_fmt = FormatMap[expected_fmt]
+		assert fmt == expected_fmt, f"Protocol mismatch: {fmt.id} != {expected_fmt.id}"
+	assert fmt.version.valid_upgrade(version), f"Load upgrade impossible, incompatible version {version}, current is {fmt.version} (will only upgrade when major version match)"
 
 def load(filename : str, expected_fmt : Format | str | None = None) -> tuple[Any, Format, VID] | None:
 	try:
@@ -63,27 +158,78 @@ def load(filename : str, expected_fmt : Format | str | None = None) -> tuple[Any
 			data = json.load(inp)
 			version = VID.from_string(data['version'])
 			fmt = FormatMap[data['format']]
-
-			if expected_fmt is not None:
-				if expected_fmt is str:
-					expected_fmt = FormatMap[expected_fmt]
-				assert fmt == expected_fmt, f"Protocol mismatch: {fmt.id} != {expected_fmt.id}"
-			assert fmt.version.valid_upgrade(version), f"Load upgrade impossible, incompatible version {version}, current is {fmt.version} (will only upgrade when major version match)"
-
+			check_header(fmt, version, expected_fmt)
 			content = fmt.parser(data['content'], version, path.abspath(filename))
 			return content, fmt, version
 	except Exception as e:
 		log("default", "VJF", f"failed to load {filename} : {e}", Log.Level.ERR)
 	return None
 
+header_size : int = 4096
+
+#* 'format' & 'version' of the top level object when they come first in `text` (save() writes them first), None otherwise
+def scan_header(text : str) -> tuple[str, str] | None:
+	decoder = json.JSONDecoder()
+	skip = lambda i: json.decoder.WHITESPACE.match(text, i).end()
+	header = {}
+	try:
+		i = skip(0)
+		if text[i] != '{':
+			return None
+		i += 1
+		while len(header) < 2:
+			key, i = decoder.raw_decode(text, skip(i))
+			i = skip(i)
+			if key not in ('format', 'version') or text[i] != ':':
+				return None
+			header[key], i = decoder.raw_decode(text, skip(i + 1))
+			i = skip(i)
+			if text[i] == ',':
+				i += 1
+	except (ValueError, IndexError):
+		return None
+	return header['format'], header['version']
+
+#* Format & version of a file without parsing its content, only reads the start of the file unless the keys are out of order
+def read_header(filename : str, expected_fmt : Format | str | None = None) -> tuple[Format, VID] | None:
+	try:
+		with open(filename, "r") as inp:
+			header = scan_header(inp.read(header_size))
+			if header is None:
+				inp.seek(0)
+				data = json.load(inp)
+				header = data['format'], data['version']
+		fmt, version = FormatMap[header[0]], VID.from_string(header[1])
+		check_header(fmt, version, expected_fmt)
+		return fmt, version
+	except Exception as e:
+		log("default", "VJF", f"failed to read header of {filename} : {e}", Log.Level.ERR)
+	return None
+
 class FileSlot:
 
 	def __init__(self, path : str = None, format_id : str = None, content : Any = None):
 		self.path = path
 		self.format_id = format_id
-		self.content = content
+		self.stored : Any = content
+		self.pending_load : bool = False #* content is only read from the file on first access
 		self.dirty = True
 
+	@property
+	def content(self) -> Any:
+		if self.pending_load and self.load() is None:
+			self.content = None
+		return self.stored
+
+	@content.setter
+	def content(self, value : Any) -> None:
+		self.stored = value
+		self.pending_load = False
+
+	#* content is available without reading the file
+	def ready(self) -> bool:
+		return not self.pending_load
+
 	def save(self, path_override : str = None, format_override : str = None, content_override : dict = None):
 		if path_override:
 			self.path = path_override
@@ -93,8 +239,8 @@ class FileSlot:
 			self.format_id = format_override
 		assert(self.path is not None)
 		assert(self.format_id is not None)
-		save(self.path, FormatMap[self.format_id], self.content)
 		self.dirty = False
+		writer.submit(self.path, FormatMap[self.format_id], self.content, self)
 
 	def load(self, path_override : str = None, format_override : str = None) -> Any:
 		if path_override:
@@ -112,8 +258,18 @@ class FileSlot:
 		self.content = content
 		return content
 
+	#* lazy slots only read the file header, their content is parsed on first access
 	@staticmethod
-	def from_file(path : str, format_id : str = None):
+	def from_file(path : str, format_id : str = None, lazy : bool = False):
 		new = FileSlot(path, format_id)
+		if lazy:
+			header = read_header(path, expected_fmt=FormatMap[format_id] if format_id else None)
+			if header is None:
+				return None
+			fmt, version = header
+			new.format_id = fmt.id
+			new.dirty = version < fmt.version
+			new.pending_load = True
+			return new
 		res = new.load()
 		return new if res is not None else None
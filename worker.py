@@ -0,0 +1,64 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import Any, Callable
+
+class Cancelled(Exception):
+	pass
+
+#* Handle on a task running on a Worker, polled from the UI thread
+class Job:
+
+	def __init__(self, name : str):
+		self.name : str = name
+		self.progress : float = 0.0
+		self.cancelled : threading.Event = threading.Event()
+		self.future : Future = None
+
+	#* called by the task itself, raising here is how a superseded task stops early
+	def report(self, progress : float) -> None:
+		if self.cancelled.is_set():
+			raise Cancelled()
+		self.progress = progress
+
+	def cancel(self) -> None:
+		self.cancelled.set()
+
+	def done(self) -> bool:
+		return self.future is not None and self.future.done()
+
+	def succeeded(self) -> bool:
+		return self.done() and not self.cancelled.is_set() and self.future.exception() is None
+
+	def result(self) -> Any:
+		return self.future.result()
+
+#* Runs one job at a time off the UI thread, by default a new submission supersedes the pending one
+class Worker:
+
+	def __init__(self, name : str, supersede : bool = True):
+		self.executor : ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+		self.supersede : bool = supersede
+		self.job : Job = None
+
+	def submit(self, name : str, task : Callable[..., Any], *args, **kwargs) -> Job:
+		if self.job and self.supersede:
+			self.job.cancel()
+		job = Job(name)
+		job.future = self.executor.submit(task, job, *args, **kwargs)
+		self.job = job
+		return job
+
+	def busy(self) -> bool:
+		return self.job is not None and not self.job.done()
+
+	#* the latest job once it is finished (successfully or not), None while running or idle
+	def poll(self) -> Job | None:
+		if self.job is None or not self.job.done():
+			return None
+		job, self.job = self.job, None
+		return job
+
+	def shutdown(self) -> None:
+		if self.job:
+			self.job.cancel()
+		self.executor.shutdown(wait=True)